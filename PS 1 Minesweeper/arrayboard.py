@@ -0,0 +1,61 @@
+"""
+NumPy-backed Minesweeper board for large simulated games.
+
+Mines are placed with a single sample without replacement, and the
+number of mines around every cell is worked out once, by summing the
+nine shifted copies of the zero-padded mine grid (a 3x3 convolution),
+so nearby_mines is a table lookup instead of a scan of the neighbors.
+
+ArrayMinesweeper can be used anywhere a minesweeper.Minesweeper is.
+NumPy is only needed by this module, not by the rest of the project.
+"""
+import random
+
+import numpy as np
+
+from minesweeper import Minesweeper
+
+
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation backed by NumPy arrays
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+
+        # Draw the seed from `random` unless given, so random.seed still
+        # makes games repeatable
+        if seed is None:
+            seed = random.getrandbits(64)
+        rng = np.random.default_rng(seed)
+
+        # Add mines at distinct random positions
+        positions = rng.choice(height * width, mines, replace=False)
+        grid = np.zeros(height * width, dtype=bool)
+        grid[positions] = True
+        grid = grid.reshape(height, width)
+        self.board = grid.tolist()
+        self.mines = {divmod(int(position), width) for position in positions}
+
+        # Count mines in every 3x3 block, then leave out the cell itself
+        padded = np.pad(grid.astype(np.int8), 1)
+        counts = -grid.astype(np.int8)
+        for di in range(3):
+            for dj in range(3):
+                counts += padded[di:di + height, dj:dj + width]
+        self.counts = counts.tolist()
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return self.counts[cell[0]][cell[1]]
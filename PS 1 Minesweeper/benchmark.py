@@ -0,0 +1,138 @@
+"""
+Plays many Minesweeper games headlessly to measure the AI.
+
+Usage: python benchmark.py [games] [height] [width] [mines] [processes] [board]
+
+Defaults to 1000 expert games (16x30 with 99 mines) spread over every
+CPU. `board` is either "list", the default minesweeper.Minesweeper, or
+"numpy" for arrayboard.ArrayMinesweeper, which needs NumPy.
+
+Reports the win rate, AI moves per second, the time taken by each
+add_knowledge call, and the size of the knowledge base as games go on.
+"""
+import importlib
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from minesweeper import MinesweeperAI
+
+# Board class for each `board` argument, by module and class name
+BOARDS = {
+    "list": ("minesweeper", "Minesweeper"),
+    "numpy": ("arrayboard", "ArrayMinesweeper"),
+}
+
+# Knowledge base size is reported at each tenth of the way through a game
+BUCKETS = 10
+
+
+def play(settings):
+    """
+    Plays one game with the AI choosing every move.
+    Returns whether it was won, the moves made, the seconds spent
+    choosing moves and updating knowledge, the seconds per add_knowledge
+    call, and (progress bucket, knowledge size) samples.
+    """
+    height, width, mines, board, seed = settings
+    random.seed(seed)
+    game = board_class(board)(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mine_count=mines)
+
+    safe_cells = height * width - mines
+    revealed = 0
+    moves = 0
+    thinking = 0.0
+    latencies = []
+    sizes = []
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        thinking += time.perf_counter() - start
+        if move is None or game.is_mine(move):
+            return False, moves, thinking, latencies, sizes
+        moves += 1
+
+        start = time.perf_counter()
+        ai.add_knowledge(move, game.nearby_mines(move))
+        elapsed = time.perf_counter() - start
+        thinking += elapsed
+        latencies.append(elapsed)
+
+        revealed += 1
+        sizes.append((min(BUCKETS - 1, BUCKETS * revealed // safe_cells), len(ai.knowledge)))
+        if revealed == safe_cells:
+            return True, moves, thinking, latencies, sizes
+
+
+def board_class(board):
+    """
+    Returns the Minesweeper class for a `board` argument.
+    """
+    module, name = BOARDS[board]
+    return getattr(importlib.import_module(module), name)
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which `fraction` of the sorted `values` fall.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    if len(sys.argv) > 7:
+        sys.exit("Usage: python benchmark.py [games] [height] [width] [mines] [processes] [board]")
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    width = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    mines = int(sys.argv[4]) if len(sys.argv) > 4 else 99
+    processes = int(sys.argv[5]) if len(sys.argv) > 5 else os.cpu_count()
+    board = sys.argv[6] if len(sys.argv) > 6 else "list"
+    if board not in BOARDS:
+        sys.exit(f"Unknown board: {board}")
+    try:
+        board_class(board)
+    except ImportError as e:
+        sys.exit(f"The {board} board is not available: {e}")
+
+    wins = 0
+    moves = 0
+    thinking = 0.0
+    latencies = []
+    sizes = [[] for _ in range(BUCKETS)]
+    settings = [(height, width, mines, board, seed) for seed in range(games)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        for won, made, seconds, calls, samples in pool.imap_unordered(play, settings, chunksize=4):
+            wins += won
+            moves += made
+            thinking += seconds
+            latencies.extend(calls)
+            for bucket, size in samples:
+                sizes[bucket].append(size)
+    elapsed = time.perf_counter() - start
+
+    print(f"{games} games of {height}x{width} with {mines} mines "
+          f"on the {board} board in {elapsed:.2f}s")
+    print(f"Won {wins} ({100 * wins / games:.1f}%)")
+    print(f"{moves} moves, {moves / thinking:.0f} moves/sec of AI time")
+    latencies.sort()
+    if latencies:
+        print("add_knowledge: " + ", ".join(
+            f"p{int(100 * fraction)} {1000 * percentile(latencies, fraction):.3f}ms"
+            for fraction in (0.5, 0.9, 0.99)
+        ) + f", max {1000 * latencies[-1]:.3f}ms")
+    print("Knowledge base size by progress through the game:")
+    for bucket, samples in enumerate(sizes):
+        if samples:
+            print(f"  {100 * bucket // BUCKETS:>3}%+: mean {sum(samples) / len(samples):.1f}, "
+                  f"max {max(samples)}")
+
+
+if __name__ == "__main__":
+    main()
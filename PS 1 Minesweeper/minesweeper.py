@@ -1,8 +1,7 @@
 import itertools
 import random
-import copy
 
-#test
+import probability
 
 
 class Minesweeper():
@@ -87,18 +86,75 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+def popcount(mask):
+    """
+    Returns the number of set bits in `mask`.
+    """
+    return bin(mask).count("1")
+
+
+def bits(mask):
+    """
+    Yields the index of every set bit in `mask`, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are stored as a bitmask where cell (i, j) is bit
+    i * width + j, so comparing and subtracting sentences are single
+    integer operations. `cells` may be given as cells, or as a mask
+    along with the board width; without a width, cells are numbered
+    as if the board were just wide enough to hold them. Cells outside
+    that width are never in the sentence.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    __slots__ = ("mask", "size", "count", "width")
+
+    def __init__(self, cells, count, width=None):
+        if isinstance(cells, int):
+            self.mask = cells
+        else:
+            cells = set(cells)
+            if width is None:
+                width = 1 + max((j for _, j in cells), default=0)
+            if any(i < 0 or j < 0 for i, j in cells):
+                raise ValueError("cells must not have negative coordinates")
+            self.mask = 0
+            for i, j in cells:
+                self.mask |= 1 << (i * width + j)
+        self.size = popcount(self.mask)
+        self.width = width
         self.count = count
 
+    def bit(self, cell):
+        """
+        Returns the single-bit mask for `cell`, or 0 if the cell
+        cannot be in the sentence.
+        """
+        i, j = cell
+        if i < 0 or not 0 <= j < self.width:
+            return 0
+        return 1 << (i * self.width + j)
+
+    @property
+    def cells(self):
+        """
+        The set of cells in the sentence.
+        """
+        return {divmod(bit, self.width) for bit in bits(self.mask)}
+
     def __eq__(self, other):
+        if self.width == other.width:
+            return self.mask == other.mask and self.count == other.count
         return self.cells == other.cells and self.count == other.count
 
     def __str__(self):
@@ -108,23 +164,27 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        if len(self.cells)==self.count:
-            return cells
+        if self.size == self.count:
+            return self.cells
+        return set()
 
     def known_safes(self):
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        if len(self.cells)==0:
-            return cells
+        if self.count == 0:
+            return self.cells
+        return set()
 
     def mark_mine(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        bit = self.bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+            self.size -= 1
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -132,8 +192,58 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        bit = self.bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+            self.size -= 1
+
+
+class CellSet():
+    """
+    Set of cells that can also pick a random member in constant time,
+    keeping the cells in a list along with each one's position in it.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = []
+        self.positions = {}
+        for cell in cells:
+            self.add(cell)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        """
+        Adds a cell, if not already present.
+        """
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        """
+        Removes a cell, if present, by moving the last cell into its place.
+        """
+        position = self.positions.pop(cell, None)
+        if position is None:
+            return
+        last = self.cells.pop()
+        if position < len(self.cells):
+            self.cells[position] = last
+            self.positions[last] = position
+
+    def choice(self):
+        """
+        Returns a random cell.
+        """
+        return random.choice(self.cells)
 
 
 class MinesweeperAI():
@@ -141,43 +251,77 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=4, width=4):
+    def __init__(self, height=4, width=4, mine_count=None, guess_time=0.1):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, if known, and seconds allowed for
+        # working out mine probabilities before guessing at random
+        self.mine_count = mine_count
+        self.guess_time = guess_time
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
-        # Keep track of cells known to be safe or mines
+        # Keep track of cells known to be safe or mines,
+        # also as bitmasks in the numbering used by Sentence
         self.mines = set()
         self.safes = set()
+        self.mine_mask = 0
+        self.safe_mask = 0
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Stack of safe cells not yet clicked on (cells clicked on after
+        # being pushed are dropped when they reach the top), and the
+        # cells not yet known to be safe or mines
+        self.safe_moves = []
+        self.unknown = CellSet(
+            (i, j) for i in range(height) for j in range(width)
+        )
+
+        # Sentences about the game known to be true, by sentence id
+        self.knowledge = {}
+
+        # Maps each cell's bit index to the ids of the sentences that mention it
+        self.index = {}
+
+        # Maps (mask, count) of every sentence to its id, to skip duplicates
+        self.lookup = {}
+
+        # Ids of sentences added or changed since they were last examined
+        self.pending = set()
+        self.next_id = 0
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
-            if not sentence.cells:
-                self.knowledge.remove(sentence)
+        self.unknown.discard(cell)
+        bit = self.bit(cell)
+        self.mine_mask |= 1 << bit
+        for sentence_id in self.index.pop(bit, set()):
+            self.update(sentence_id, lambda sentence: sentence.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
-            if not sentence.cells:
-                self.knowledge.remove(sentence)
+        self.unknown.discard(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.append(cell)
+        bit = self.bit(cell)
+        self.safe_mask |= 1 << bit
+        for sentence_id in self.index.pop(bit, set()):
+            self.update(sentence_id, lambda sentence: sentence.mark_safe(cell))
 
     def add_knowledge(self, cell, count):
         """
@@ -193,98 +337,112 @@ class MinesweeperAI():
                if it can be concluded based on the AI's knowledge base
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
+
+        Steps 4 and 5 run as a worklist until nothing new follows:
+        only sentences that were added or changed are re-examined,
+        and only against the sentences sharing a cell with them.
         """
         self.moves_made.add(cell)
         self.mark_safe(cell)
-        print (f'Known Mines: {self.mines}')
-        neighbors = set ()                                    # Create a set of the neighbors for the sentence.
-        for i in range(cell[0] - 1, cell[0] + 2):             # Loop over all cells within one row and column of cell
-            for j in range(cell[1] - 1, cell[1] + 2):
-                if (i, j) == cell or (i,j) in self.safes:     # Ignore the cell itself or if it is already in safe list.
-                    continue
-                if 0 <= i < self.height and 0 <= j < self.width:  # Otherwise add cell to neighbors.
-                    neighbors.add((i,j))
 
-        if count == 0:                              # If there are no mines in the count, mark all cells
-            for item in neighbors:
-                print (f'In initial pass, markings {item} as safe.')
-                self.mark_safe(item)
-            return
+        # Each row of the 3x3 block around the cell is one run of bits
+        first = max(cell[1] - 1, 0)
+        run = (1 << (min(cell[1] + 2, self.width) - first)) - 1
+        neighbors = 0
+        for i in range(max(cell[0] - 1, 0), min(cell[0] + 2, self.height)):
+            neighbors |= run << self.bit((i, first))
+        neighbors &= ~(1 << self.bit(cell))
+        self.add_sentence(neighbors, count)
+        self.propagate()
+
+    def bit(self, cell):
+        """
+        Returns the index of `cell` in sentence bitmasks.
+        """
+        return cell[0] * self.width + cell[1]
 
-        if len(neighbors) == count:
-            for item in neighbors:
-                print (f'In initial pass, marking {item} as a mine.')
-                self.mark_mine(item)
+    def add_sentence(self, mask, count):
+        """
+        Adds the sentence that `count` of the cells in `mask` are mines
+        to the knowledge base, leaving out cells already known to be safe
+        or mines, unless it is empty or already known.
+        """
+        known_mines = mask & self.mine_mask
+        if known_mines:
+            count -= popcount(known_mines)
+        mask &= ~(self.mine_mask | self.safe_mask)
+        key = (mask, count)
+        if not mask or key in self.lookup:
             return
 
-        if len(neighbors) == 0:
-            return
-
-        newKnowledge = Sentence(neighbors, count)  # Create the sentence.
-        knowledgeCopy = copy.deepcopy(self.knowledge)           # Copy the knowledge
-
-        for sentence in knowledgeCopy:
-            if not sentence.cells:
-                self.knowledge.remove(sentence)
-            if sentence.cells.issubset(newKnowledge.cells) and sentence.cells != newKnowledge.cells:      # from existing sentences in the knowledge base.
-                print (f'Subtracting {sentence} from {newKnowledge}.')
-                derivedSentence = Sentence(newKnowledge.cells.difference(sentence.cells),
-                                                                                    newKnowledge.count - sentence.count)
-                print (f'Result {derivedSentence}')
-                if derivedSentence.count == 0:
-                    for item in derivedSentence.cells:
-                        print (f'Adding {item} to safe cells.')
-                        self.mark_safe(item)
-                elif derivedSentence.count == len (derivedSentence.cells):
-                    for item in derivedSentence.cells:
-                        print (f'Adding {item} to mines.')
-                        self.mark_mine(item)
-                else:
-                    print (f'Adding {derivedSentence} to Knowledge.')
-                    self.knowledge.append(derivedSentence)
-            if newKnowledge.cells.issubset(sentence.cells) and sentence.cells != newKnowledge.cells:
-                print(f'Subtracting {newKnowledge} from {sentence}.')
-                derivedSentence = Sentence(sentence.cells.difference(newKnowledge.cells),
-                                                                                    sentence.count - newKnowledge.count)
-                print (f'Result: {derivedSentence}')
-                if derivedSentence.count == 0:
-                    for item in derivedSentence.cells:
-                        print(f'Adding {item} to safe cells.')
-                        self.mark_safe(item)
-                elif derivedSentence.count == len(derivedSentence.cells):
-                    for item in derivedSentence.cells:
-                        print(f'Adding {item} to mines.')
-                        self.mark_mine(item)
-                else:
-                    print (f'Adding {derivedSentence} to Knowledge.')
-                    self.knowledge.append(derivedSentence)
-
-        if newKnowledge not in self.knowledge:
-            self.knowledge.append(newKnowledge)
-
-        for sentence in self.knowledge:
-            if not sentence.cells:
-                print ('In cleanup, removing empty sentence.')
-                self.knowledge.remove(sentence)
-            if len(sentence.cells)==sentence.count:
-                eraser = []
-                for item in sentence.cells:
-                    eraser.append(item)
-                for item in eraser:
-                    print(f'In cleanup, marking {item} as mine.')
-                    self.mark_mine(item)
-            if sentence.count == 0:
-                eraser = []
-                for item in sentence.cells:
-                    eraser.append(item)
-                for item in eraser:
-                    print (f'In cleanup, marking {item} as safe.')
-                    self.mark_safe(item)
-
-
-
-
+        sentence_id = self.next_id
+        self.next_id += 1
+        self.knowledge[sentence_id] = Sentence(mask, count, self.width)
+        self.lookup[key] = sentence_id
+        for bit in bits(mask):
+            self.index.setdefault(bit, set()).add(sentence_id)
+        self.pending.add(sentence_id)
 
+    def update(self, sentence_id, change):
+        """
+        Applies `change` to a sentence, keeping the duplicate lookup in
+        step, and queues the sentence to be examined again.
+        """
+        sentence = self.knowledge[sentence_id]
+        del self.lookup[(sentence.mask, sentence.count)]
+        change(sentence)
+        key = (sentence.mask, sentence.count)
+        if key in self.lookup:
+            self.remove_sentence(sentence_id, registered=False)
+        else:
+            self.lookup[key] = sentence_id
+            self.pending.add(sentence_id)
+
+    def remove_sentence(self, sentence_id, registered=True):
+        """
+        Drops a sentence from the knowledge base and every index.
+        """
+        sentence = self.knowledge.pop(sentence_id)
+        if registered:
+            del self.lookup[(sentence.mask, sentence.count)]
+        for bit in bits(sentence.mask):
+            self.index[bit].discard(sentence_id)
+        self.pending.discard(sentence_id)
+
+    def propagate(self):
+        """
+        Examines pending sentences until none are left, marking cells
+        that a sentence settles and adding the difference between
+        any two sentences where one's cells are a subset of the other's.
+        """
+        while self.pending:
+            sentence_id = self.pending.pop()
+            sentence = self.knowledge[sentence_id]
+
+            if not sentence.mask:
+                self.remove_sentence(sentence_id)
+                continue
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                # Marking empties the sentence, which then removes itself
+                for cell in mines:
+                    self.mark_mine(cell)
+                for cell in safes:
+                    self.mark_safe(cell)
+                continue
+
+            mask = sentence.mask
+            overlapping = set()
+            for bit in bits(mask):
+                overlapping.update(self.index[bit])
+            overlapping.discard(sentence_id)
+            for other_id in overlapping:
+                other = self.knowledge[other_id]
+                if other.mask & mask == other.mask:
+                    self.add_sentence(mask & ~other.mask, sentence.count - other.count)
+                elif other.mask & mask == mask:
+                    self.add_sentence(other.mask & ~mask, other.count - sentence.count)
 
     def make_safe_move(self):
         """
@@ -295,64 +453,21 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        if not self.safes:
-            return
-        possibleMoves = self.safes.difference(self.moves_made)
-        if not possibleMoves:
-            return
-        returnMove = possibleMoves.pop()
-        print (f'Chose {returnMove} as a safe move.')
-        return returnMove
+        while self.safe_moves and self.safe_moves[-1] in self.moves_made:
+            self.safe_moves.pop()
+        if not self.safe_moves:
+            return None
+        return self.safe_moves[-1]
 
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking the one least likely to be a mine.
         """
-        i = random.randrange(self.height)
-        j = random.randrange(self.width)
-        move = (i,j)
-        while move in self.mines or move in self.moves_made:
-            i = random.randrange(self.height)
-            j = random.randrange(self.width)
-            move = (i, j)
-        print(f'Chose {move} as a random move.')
-        return move
-
-
-game = Minesweeper()
-for i in range(game.height):
-    row = []
-    for j in range(game.width):
-        game.board[i][j] = False
-
-game.board[1][3] = True
-game.board[2][2] = True
-
-
-hal = MinesweeperAI()
-
-
-
-tset = {1,2,3,4,5}
-tset2 = {2,3,4}
-
-def makeAmove(AI, game):
-    if AI.make_safe_move != None:
-        move = AI.make_safe_move()
-        AI.add_knowledge (move, game.nearby_mines(move))
-    else:
-        move = AI.make_random_move()
-        AI.add_knowledge (move, game.nearby_mines(move))
-
-
-#hal.add_knowledge((0,0),game.nearby_mines((0,0)))
-
-#hal.add_knowledge((0,1), 1)
-#hal.add_knowledge((0,2), 1)
-
-#hal.add_knowledge((2,1), 2)
-
-#makeAmove(hal, game)
\ No newline at end of file
+        move = self.make_safe_move()
+        if move is not None:
+            return move
+        return probability.safest_cell(self, self.unknown, self.guess_time)
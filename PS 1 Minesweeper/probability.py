@@ -0,0 +1,238 @@
+"""
+Exact mine probabilities for choosing a guess in Minesweeper.
+
+The unknown cells mentioned by the AI's knowledge (the frontier) are
+split into independent groups of cells linked by shared sentences.
+Every assignment of mines consistent with a group's sentences is
+enumerated by backtracking, and the groups are combined with the cells
+no sentence mentions, weighting each way of placing the remaining mines
+equally, so the probability of every unknown cell being a mine is exact.
+"""
+import random
+import time
+
+
+class Timeout(Exception):
+    """
+    Raised when enumerating assignments takes longer than allowed.
+    """
+
+
+def safest_cell(ai, unknown, time_cap=0.1):
+    """
+    Returns the cell in `unknown`, a minesweeper.CellSet, least likely
+    to be a mine, breaking ties at random. If nothing is known about any
+    cell, or the probabilities cannot be worked out within `time_cap`
+    seconds, returns a uniformly random unknown cell.
+    """
+    if not unknown:
+        return None
+    if not ai.knowledge:
+        return unknown.choice()
+    try:
+        probabilities = mine_probabilities(ai, unknown, time.perf_counter() + time_cap)
+    except Timeout:
+        return unknown.choice()
+    lowest = min(probabilities.values())
+    return random.choice(sorted(cell for cell, p in probabilities.items() if p == lowest))
+
+
+def mine_probabilities(ai, unknown, deadline):
+    """
+    Returns a dict mapping every cell in `unknown` to the probability
+    that it is a mine, given the AI's knowledge and, if the AI knows it,
+    the number of mines on the board.
+    Raises Timeout once the deadline has passed.
+    """
+    constraints = [
+        (sentence.cells, sentence.count)
+        for sentence in ai.knowledge.values() if sentence.mask
+    ]
+    frontier = set()
+    for cells, _ in constraints:
+        frontier.update(cells)
+    others = len(unknown) - len(frontier)
+
+    remaining = None
+    if ai.mine_count is not None:
+        remaining = ai.mine_count - len(ai.mines)
+
+    results = [
+        enumerate_component(cells, sentences, remaining, deadline)
+        for cells, sentences in components(constraints)
+    ]
+
+    # Number of ways to place `t` mines among the cells no sentence mentions
+    if remaining is None:
+        spread = None
+    else:
+        spread = [1]
+        for t in range(min(remaining, others)):
+            spread.append(spread[-1] * (others - t) // (t + 1))
+
+    def weight(distribution):
+        """
+        Total weight of a distribution of frontier mine counts, once
+        the rest of the mines are placed among the other cells.
+        """
+        if spread is None:
+            return sum(distribution.values())
+        return sum(
+            ways * spread[remaining - placed]
+            for placed, ways in distribution.items()
+            if 0 <= remaining - placed < len(spread)
+        )
+
+    probabilities = {}
+    total = None
+    for n, (cells, ways, hits) in enumerate(results):
+        rest = {0: 1}
+        for m, (_, other_ways, _) in enumerate(results):
+            if m != n:
+                rest = convolve(rest, other_ways)
+        weights = {
+            placed: weight({placed + t: w for t, w in rest.items()})
+            for placed in ways
+        }
+        total = sum(ways[placed] * weights[placed] for placed in ways)
+        if not total:
+            # The knowledge is inconsistent with the mine count; ignore the count
+            weights = {placed: sum(rest.values()) for placed in ways}
+            total = sum(ways[placed] * weights[placed] for placed in ways)
+        for i, cell in enumerate(cells):
+            probabilities[cell] = sum(
+                hits[placed][i] * weights[placed] for placed in ways
+            ) / total
+
+    if others:
+        if spread is None:
+            frontier_probabilities = [probabilities[cell] for cell in frontier]
+            p = sum(frontier_probabilities) / len(frontier_probabilities) if frontier else 0.5
+        else:
+            distribution = {0: 1}
+            for _, ways, _ in results:
+                distribution = convolve(distribution, ways)
+            total = weight(distribution)
+            expected = sum(
+                ways * spread[remaining - placed] * (remaining - placed)
+                for placed, ways in distribution.items()
+                if 0 <= remaining - placed < len(spread)
+            )
+            p = expected / total / others if total else 0.5
+        for cell in unknown:
+            if cell not in frontier:
+                probabilities[cell] = p
+    return probabilities
+
+
+def components(constraints):
+    """
+    Splits (cells, count) constraints into groups that share no cells.
+    Yields (cells in search order, constraints) for each group.
+    """
+    by_cell = {}
+    for n, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            by_cell.setdefault(cell, []).append(n)
+
+    seen = set()
+    for start in range(len(constraints)):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = [start]
+        cells = []
+        placed = set()
+        for n in queue:
+            for cell in sorted(constraints[n][0]):
+                if cell in placed:
+                    continue
+                placed.add(cell)
+                cells.append(cell)
+                for m in by_cell[cell]:
+                    if m not in seen:
+                        seen.add(m)
+                        queue.append(m)
+        yield cells, [constraints[n] for n in queue]
+
+
+def enumerate_component(cells, constraints, limit, deadline):
+    """
+    Enumerates every assignment of mines to `cells` satisfying all
+    `constraints`, with at most `limit` mines if a limit is given.
+    Returns (cells, ways, hits) where ways[m] counts the assignments
+    with m mines and hits[m][i] counts those where cells[i] is a mine.
+    """
+    position = {cell: i for i, cell in enumerate(cells)}
+    watching = [[] for _ in cells]
+    need = []
+    left = []
+    for n, (members, count) in enumerate(constraints):
+        need.append(count)
+        left.append(len(members))
+        for cell in members:
+            watching[position[cell]].append(n)
+
+    # Depth-first search with an explicit stack: assignment[:i] is set,
+    # and untried[i] is the next value to try for cells[i] (2 once both are tried)
+    assignment = [0] * len(cells)
+    untried = [0] * len(cells)
+    ways = {}
+    hits = {}
+    i = 0
+    placed = 0
+    steps = 0
+    while True:
+        steps += 1
+        if steps % 1024 == 0 and time.perf_counter() > deadline:
+            raise Timeout
+
+        if i == len(cells) or untried[i] > 1:
+            if i == len(cells):
+                ways[placed] = ways.get(placed, 0) + 1
+                row = hits.setdefault(placed, [0] * len(cells))
+                for j, mine in enumerate(assignment):
+                    row[j] += mine
+            else:
+                untried[i] = 0
+            # Backtrack, undoing the assignment of the previous cell
+            i -= 1
+            if i < 0:
+                break
+            mine = assignment[i]
+            for n in watching[i]:
+                need[n] += mine
+                left[n] += 1
+            placed -= mine
+            assignment[i] = 0
+            continue
+
+        mine = untried[i]
+        untried[i] += 1
+        if mine and limit is not None and placed >= limit:
+            continue
+        for n in watching[i]:
+            need[n] -= mine
+            left[n] -= 1
+        if all(0 <= need[n] <= left[n] for n in watching[i]):
+            assignment[i] = mine
+            placed += mine
+            i += 1
+        else:
+            for n in watching[i]:
+                need[n] += mine
+                left[n] += 1
+
+    return cells, ways, hits
+
+
+def convolve(first, second):
+    """
+    Combines two {mines: ways} distributions of independent groups
+    into the distribution of their total.
+    """
+    combined = {}
+    for a, x in first.items():
+        for b, y in second.items():
+            combined[a + b] = combined.get(a + b, 0) + x * y
+    return combined
@@ -1,8 +1,10 @@
+import copy
 import pygame
 import sys
 import time
 
 from minesweeper import Minesweeper, MinesweeperAI
+from worker import MoveWorker
 
 HEIGHT = 8
 WIDTH = 8
@@ -39,13 +41,30 @@ mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mine_count=MINES)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
 lost = False
 
+# Searches for AI moves in the background so the window keeps redrawing
+worker = MoveWorker()
+
+
+def ai_move(ai):
+    """
+    Returns the AI's next move, and whether it is a "safe" or "random"
+    move, or (None, None) if no moves are left.
+    """
+    move = ai.make_safe_move()
+    if move is not None:
+        return move, "safe"
+    move = ai.make_random_move()
+    if move is not None:
+        return move, "random"
+    return None, None
+
 # Show instructions initially
 instructions = True
 
@@ -161,6 +180,18 @@ while True:
 
     move = None
 
+    # Pick up the AI move once the background search has finished
+    done, choice = worker.poll()
+    if done:
+        move, kind = choice
+        if kind is None:
+            flags = ai.mines.copy()
+            print("No moves left to make.")
+        elif kind == "random":
+            print("No known safe moves, AI making random move.")
+        else:
+            print("AI making safe move.")
+
     left, _, right = pygame.mouse.get_pressed()
 
     # Check for a right-click to toggle flagging
@@ -178,31 +209,26 @@ while True:
     elif left == 1:
         mouse = pygame.mouse.get_pos()
 
-        # If AI button clicked, make an AI move
+        # If AI button clicked, make an AI move. The search gets its own copy
+        # of the AI, and waits until any move delivered this frame is applied
         if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
-                else:
-                    print("No known safe moves, AI making random move.")
-            else:
-                print("AI making safe move.")
+            if not done:
+                worker.start(ai_move, copy.deepcopy(ai))
             time.sleep(0.2)
 
         # Reset game state
         elif resetButton.collidepoint(mouse):
+            worker.cancel()
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mine_count=MINES)
             revealed = set()
             flags = set()
             lost = False
             continue
 
-        # User-made move
-        elif not lost:
+        # User-made move, unless the AI is still choosing one
+        # or its move arrived this frame
+        elif not lost and not done and not worker.busy():
             for i in range(HEIGHT):
                 for j in range(WIDTH):
                     if (cells[i][j].collidepoint(mouse)
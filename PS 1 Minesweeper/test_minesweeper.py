@@ -0,0 +1,195 @@
+"""
+Tests for the Minesweeper AI and its mine probabilities.
+
+Run with: python -m unittest test_minesweeper
+"""
+import itertools
+import random
+import time
+import unittest
+
+import probability
+from minesweeper import CellSet, Minesweeper, MinesweeperAI, Sentence, bits
+
+
+def play(ai, game, moves):
+    """
+    Makes up to `moves` AI moves, stopping early on a mine.
+    """
+    for _ in range(moves):
+        move = ai.make_safe_move() or ai.make_random_move()
+        if move is None or game.is_mine(move):
+            return
+        ai.add_knowledge(move, game.nearby_mines(move))
+
+
+def brute_force(ai, mines):
+    """
+    Returns the probability of each unknown cell being a mine, counting
+    every placement of the remaining mines consistent with the knowledge.
+    """
+    cells = sorted(ai.unknown)
+    hits = dict.fromkeys(cells, 0)
+    total = 0
+    for placement in itertools.combinations(cells, mines - len(ai.mines)):
+        placed = set(placement)
+        if all(len(placed & sentence.cells) == sentence.count
+               for sentence in ai.knowledge.values()):
+            total += 1
+            for cell in placement:
+                hits[cell] += 1
+    return {cell: hits[cell] / total for cell in cells}
+
+
+class ProbabilityTest(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        height, width, mines = 4, 5, 5
+        for seed in range(200):
+            with self.subTest(seed=seed):
+                random.seed(seed)
+                game = Minesweeper(height=height, width=width, mines=mines)
+                ai = MinesweeperAI(height=height, width=width, mine_count=mines)
+                play(ai, game, random.randint(1, 4))
+                if not ai.unknown:
+                    continue
+                expected = brute_force(ai, mines)
+                found = probability.mine_probabilities(ai, ai.unknown, time.perf_counter() + 10)
+                self.assertEqual(set(found), set(expected))
+                for cell, p in expected.items():
+                    self.assertAlmostEqual(found[cell], p)
+
+    def test_without_mine_count(self):
+        ai = MinesweeperAI(height=3, width=3)
+        ai.add_knowledge((0, 0), 1)
+        found = probability.mine_probabilities(ai, ai.unknown, time.perf_counter() + 10)
+        for cell in ((0, 1), (1, 0), (1, 1)):
+            self.assertAlmostEqual(found[cell], 1 / 3)
+
+    def test_timeout_falls_back_to_random_cell(self):
+        # A chain of 600 cells, each neighboring pair holding one mine
+        ai = MinesweeperAI(height=1, width=601, mine_count=300)
+        for j in range(600):
+            ai.add_sentence((1 << ai.bit((0, j))) | (1 << ai.bit((0, j + 1))), 1)
+        ai.pending.clear()
+
+        with self.assertRaises(probability.Timeout):
+            probability.mine_probabilities(ai, ai.unknown, time.perf_counter())
+
+        chosen = []
+        choice = ai.unknown.choice
+
+        def recording():
+            chosen.append(choice())
+            return chosen[-1]
+
+        ai.unknown.choice = recording
+        move = probability.safest_cell(ai, ai.unknown, time_cap=0)
+        self.assertEqual(chosen, [move])
+        self.assertIn(move, ai.unknown)
+
+
+class InferenceTest(unittest.TestCase):
+
+    def assertConsistent(self, ai, game):
+        """
+        Checks that everything the AI has concluded is true of `game`,
+        and that its knowledge base and indexes agree with each other.
+        """
+        self.assertFalse(ai.safes & game.mines)
+        self.assertLessEqual(ai.mines, game.mines)
+
+        cells = {(i, j) for i in range(ai.height) for j in range(ai.width)}
+        self.assertEqual(set(ai.unknown), cells - ai.safes - ai.mines)
+        self.assertEqual(len(ai.unknown), len(cells - ai.safes - ai.mines))
+
+        known = ai.mine_mask | ai.safe_mask
+        self.assertEqual(len(ai.lookup), len(ai.knowledge))
+        for sentence_id, sentence in ai.knowledge.items():
+            self.assertEqual(ai.lookup[(sentence.mask, sentence.count)], sentence_id)
+            self.assertFalse(sentence.mask & known)
+            for bit in bits(sentence.mask):
+                self.assertIn(sentence_id, ai.index[bit])
+            mines = len(sentence.cells & game.mines)
+            self.assertEqual(mines, sentence.count)
+
+    def test_random_games(self):
+        for height, width, mines in ((4, 4, 3), (8, 8, 10), (9, 13, 30)):
+            for seed in range(40):
+                with self.subTest(height=height, width=width, mines=mines, seed=seed):
+                    random.seed(seed)
+                    game = Minesweeper(height=height, width=width, mines=mines)
+                    ai = MinesweeperAI(height=height, width=width, mine_count=mines)
+                    while True:
+                        move = ai.make_safe_move() or ai.make_random_move()
+                        if move is None or game.is_mine(move):
+                            break
+                        self.assertNotIn(move, ai.moves_made)
+                        self.assertNotIn(move, ai.mines)
+                        ai.add_knowledge(move, game.nearby_mines(move))
+                        self.assertConsistent(ai, game)
+
+    def test_safe_moves_skip_cells_already_made(self):
+        ai = MinesweeperAI(height=3, width=3)
+        ai.add_knowledge((0, 0), 0)
+        ai.moves_made.add((0, 1))
+        ai.moves_made.add((1, 1))
+        self.assertEqual(ai.make_safe_move(), (1, 0))
+        ai.moves_made.add((1, 0))
+        self.assertIsNone(ai.make_safe_move())
+
+
+class SentenceTest(unittest.TestCase):
+
+    def test_cells_round_trip(self):
+        cells = {(0, 0), (1, 2), (3, 1)}
+        self.assertEqual(Sentence(cells, 2).cells, cells)
+        self.assertEqual(Sentence(cells, 2, width=5).cells, cells)
+
+    def test_mark_cell_outside_width(self):
+        # (0, 1) would share a bit with (1, 0) if the width were not checked
+        sentence = Sentence({(0, 0), (1, 0)}, 1)
+        sentence.mark_mine((0, 1))
+        sentence.mark_safe((0, 1))
+        sentence.mark_safe((0, -1))
+        self.assertEqual(sentence.cells, {(0, 0), (1, 0)})
+        self.assertEqual(sentence.count, 1)
+
+    def test_mark_cell(self):
+        sentence = Sentence({(0, 0), (1, 0), (1, 1)}, 2)
+        sentence.mark_mine((1, 0))
+        self.assertEqual((sentence.cells, sentence.count), ({(0, 0), (1, 1)}, 1))
+        sentence.mark_safe((0, 0))
+        self.assertEqual(sentence.known_mines(), {(1, 1)})
+
+    def test_negative_cells(self):
+        with self.assertRaises(ValueError):
+            Sentence({(0, -1)}, 0)
+
+    def test_equality_across_widths(self):
+        self.assertEqual(Sentence({(1, 1)}, 1), Sentence({(1, 1)}, 1, width=8))
+
+
+class CellSetTest(unittest.TestCase):
+
+    def test_add_and_discard(self):
+        random.seed(0)
+        cells = CellSet((i, j) for i in range(5) for j in range(5))
+        expected = set(cells)
+        for _ in range(40):
+            cell = (random.randrange(6), random.randrange(6))
+            if random.random() < 0.5:
+                cells.add(cell)
+                expected.add(cell)
+            else:
+                cells.discard(cell)
+                expected.discard(cell)
+            self.assertEqual(set(cells), expected)
+            self.assertEqual(len(cells), len(expected))
+            for position, cell in enumerate(cells.cells):
+                self.assertEqual(cells.positions[cell], position)
+        self.assertIn(cells.choice(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Runs AI move searches off the pygame render loop.
+"""
+import threading
+
+
+class MoveWorker():
+    """
+    Computes one AI move at a time on a background thread.
+
+    The render loop calls `start` when the AI should move and `poll`
+    every frame until the move is ready. `cancel` discards the move
+    being computed, e.g. when the game is reset; the search itself
+    finishes in the background, but its result is thrown away.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.thread = None
+        self.result = None
+
+    def busy(self):
+        """
+        Returns True while a move is being computed or waiting to be polled.
+        """
+        with self.lock:
+            return self.thread is not None
+
+    def start(self, function, *args):
+        """
+        Starts computing function(*args), unless a move is already pending.
+        """
+        with self.lock:
+            if self.thread is not None:
+                return
+            generation = self.generation
+
+            def run():
+                try:
+                    move, error = function(*args), None
+                except Exception as e:
+                    move, error = None, e
+                with self.lock:
+                    if generation == self.generation:
+                        self.result = (move, error)
+
+            self.thread = threading.Thread(target=run, daemon=True)
+            self.thread.start()
+
+    def poll(self):
+        """
+        Returns (True, move) once the pending move is ready,
+        (False, None) otherwise. Re-raises any error from the search.
+        """
+        with self.lock:
+            if self.result is None:
+                return False, None
+            move, error = self.result
+            self.result = None
+            self.thread = None
+        if error is not None:
+            raise error
+        return True, move
+
+    def cancel(self):
+        """
+        Forgets the pending move, if any.
+        """
+        with self.lock:
+            self.generation += 1
+            self.thread = None
+            self.result = None
@@ -0,0 +1,108 @@
+"""
+Compares the tic-tac-toe search modes on test positions.
+
+Usage: python benchmark.py
+
+For every non-terminal position in testboards.py, plus every position
+after the first move, reports the nodes visited and time taken by each
+search mode, starting from an empty transposition table, and checks that
+every mode chooses the same move as plain minimax, exiting with status 1
+if one does not. test_tictactoe.py checks every reachable position.
+"""
+import sys
+import time
+
+import bitboard
+import testboards
+import tictactoe as ttt
+
+def plain_minimax(board):
+    """
+    Runs minimax searching symmetric positions separately.
+    """
+    ttt.SYMMETRY = False
+    try:
+        return ttt.minimax(board)
+    finally:
+        ttt.SYMMETRY = True
+
+
+MODES = {
+    "minimax": plain_minimax,
+    "symmetry": ttt.minimax,
+    "alphabeta": ttt.alphabeta,
+    "bitboard": bitboard.minimax,
+}
+
+
+def positions():
+    """
+    Returns (name, board) pairs to search.
+    """
+    boards = []
+    for name in dir(testboards):
+        board = getattr(testboards, name)
+        if isinstance(board, list) and not ttt.terminal(board):
+            boards.append((name, board))
+    for move in ttt.actions(ttt.initial_state()):
+        boards.append((f"opening {move}", ttt.result(ttt.initial_state(), move)))
+    return boards
+
+
+def count_nodes():
+    """
+    Wraps GameState.terminal, which the list-based search modes call once
+    per node visited. Returns the counter, a one-item list to reset and read.
+    The bitboard mode evaluates each node once into bitboard.VALUES,
+    so its nodes are counted from there instead.
+    """
+    counter = [0]
+    terminal = ttt.GameState.terminal
+
+    def counting(state):
+        counter[0] += 1
+        return terminal(state)
+
+    ttt.GameState.terminal = counting
+    return counter
+
+
+def main():
+    # Search from scratch instead of loading the precomputed table or book
+    ttt.TABLE_FILE = ""
+    ttt.BOOK_FILE = ""
+    counter = count_nodes()
+    totals = {mode: [0, 0.0] for mode in MODES}
+    failed = False
+
+    print(f"{'position':<18}" + "".join(f"{mode:>24}" for mode in MODES))
+    for name, board in positions():
+        line = f"{name:<18}"
+        moves = {}
+        for mode, search in MODES.items():
+            ttt.TABLE.clear()
+            bitboard.VALUES.clear()
+            counter[0] = 0
+            start = time.perf_counter()
+            moves[mode] = search(board)
+            elapsed = time.perf_counter() - start
+            nodes = counter[0] + len(bitboard.VALUES)
+            totals[mode][0] += nodes
+            totals[mode][1] += elapsed
+            line += f"{nodes:>10} nodes {1000 * elapsed:>7.1f}ms"
+        print(line)
+        for mode, move in moves.items():
+            if move != moves["minimax"]:
+                print(f"  {mode} chose {move}, minimax chose {moves['minimax']}!")
+                failed = True
+
+    line = f"{'total':<18}"
+    for nodes, elapsed in totals.values():
+        line += f"{nodes:>10} nodes {1000 * elapsed:>7.1f}ms"
+    print(line)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
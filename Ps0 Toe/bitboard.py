@@ -0,0 +1,154 @@
+"""
+Bitboard engine for Tic Tac Toe.
+
+A position is two 9-bit ints, one per player, where cell (i, j) is
+bit 3 * i + j. Moves are applied with bit operations and wins are
+found by testing the position against a table of line masks, so the
+search never builds or copies a list-of-lists board.
+
+from_board and to_board convert to and from the boards used by
+tictactoe.py and runner.py, and minimax takes and returns the same
+board and (i, j) action as tictactoe.minimax.
+"""
+import math
+import random
+
+from tictactoe import X, O, EMPTY
+
+FULL = 0b111111111
+
+# Rows, columns and both diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Single-bit mask for every cell, in the order tictactoe.actions lists them
+CELLS = tuple(1 << bit for bit in range(9))
+
+# Minimax value of every position searched so far, by (x, o)
+VALUES = {}
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards for a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board for (x, o) bitboards.
+    """
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            row.append(X if x & bit else O if o & bit else EMPTY)
+        board.append(row)
+    return board
+
+
+def to_action(cell):
+    """
+    Returns the (i, j) action for a single-bit cell mask.
+    """
+    return divmod(cell.bit_length() - 1, 3)
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X has the next turn.
+    """
+    return bin(x).count("1") == bin(o).count("1")
+
+
+def won(mask):
+    """
+    Returns True if the marks in `mask` complete a line.
+    """
+    for line in WIN_MASKS:
+        if mask & line == line:
+            return True
+    return False
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if won(x):
+        return X
+    if won(o):
+        return O
+    return None
+
+
+def value(x, o):
+    """
+    Returns the minimax value of the position, scaled like
+    tictactoe.value: utility times empty cells plus two.
+    """
+    key = (x, o)
+    if key in VALUES:
+        return VALUES[key]
+    empty = FULL & ~(x | o)
+    empties = bin(empty).count("1")
+    if won(x):
+        v = empties + 2
+    elif won(o):
+        v = -(empties + 2)
+    elif not empty:
+        v = 0
+    elif x_to_move(x, o):
+        v = -math.inf
+        for cell in CELLS:
+            if empty & cell:
+                v = max(v, value(x | cell, o))
+    else:
+        v = math.inf
+        for cell in CELLS:
+            if empty & cell:
+                v = min(v, value(x, o | cell))
+    VALUES[key] = v
+    return v
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    choosing the same move as tictactoe.minimax.
+    """
+    x, o = from_board(board)
+    empty = FULL & ~(x | o)
+    if empty == FULL:
+        return random.choice([to_action(cell) for cell in CELLS])
+
+    bmove = ()
+    if x_to_move(x, o):  # Maximizing player.
+        maxval = -math.inf
+        for cell in CELLS:
+            if empty & cell:
+                moveval = value(x | cell, o)
+                if moveval > maxval:
+                    maxval = moveval
+                    bmove = to_action(cell)
+    else:  # Minimizing player.
+        minval = math.inf
+        for cell in CELLS:
+            if empty & cell:
+                moveval = value(x, o | cell)
+                if moveval < minval:
+                    minval = moveval
+                    bmove = to_action(cell)
+    return bmove
@@ -0,0 +1,61 @@
+"""
+Generates the solved-game book for 3x3 Tic Tac Toe.
+
+Usage: python book.py [file]
+
+Solves every position reachable from the empty board once and writes
+the value and best moves of each to a compact binary table, indexed by
+tictactoe.position_index, that tictactoe.minimax reads moves from.
+"""
+import sys
+from array import array
+
+import tictactoe as ttt
+
+
+def solve():
+    """
+    Returns (values, masks) arrays over all position indexes: the minimax
+    value of each reachable position (UNREACHABLE otherwise) and a bitmask
+    of its best moves, bit 3 * i + j standing for move (i, j).
+    """
+    values = array("b", [ttt.UNREACHABLE]) * ttt.POSITIONS
+    masks = array("H", [0]) * ttt.POSITIONS
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        index = ttt.position_index(board)
+        if values[index] != ttt.UNREACHABLE:
+            continue
+        values[index] = ttt.value(board)
+
+        # Like minimax, look one move ahead even from finished games
+        children = {move: ttt.result(board, move) for move in ttt.actions(board)}
+        if children:
+            scores = {move: ttt.value(child) for move, child in children.items()}
+            best = (max if ttt.player(board) == ttt.X else min)(scores.values())
+            for (i, j), score in scores.items():
+                if score == best:
+                    masks[index] |= 1 << (3 * i + j)
+        if not ttt.terminal(board):
+            stack.extend(children.values())
+    return values, masks
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [file]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_FILE
+
+    values, masks = solve()
+    if sys.byteorder == "big":
+        masks.byteswap()
+    with open(path, "wb") as f:
+        f.write(values.tobytes())
+        f.write(masks.tobytes())
+    reachable = sum(1 for v in values if v != ttt.UNREACHABLE)
+    print(f"Solved {reachable} positions into {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Headless driver for measuring Tic Tac Toe AI throughput.
+
+Usage: python headless.py solve positions [processes]
+       python headless.py play games [processes] [rows] [cols] [k] [budget]
+
+`solve` reads one board per line in the format made by tictactoe.encode,
+e.g. "X-O/-X-/--O", and prints each board's minimax value (3x3 only)
+and best move. `play` runs complete AI-versus-AI games. Both spread the
+work across a process pool and report positions per second and
+percentiles of the time taken per move.
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def solve(key):
+    """
+    Returns (key, value, move, seconds) for one encoded board.
+    The value is only known exactly for standard 3x3 boards.
+    """
+    board = ttt.decode(key)
+    start = time.perf_counter()
+    move = ttt.minimax(board)
+    elapsed = time.perf_counter() - start
+    value = ttt.value(board) if (len(board), len(board[0])) == (3, 3) else None
+    return key, value, move, elapsed
+
+
+def play(settings):
+    """
+    Plays one AI-versus-AI game on a rows x cols board with k to win.
+    Returns the winner (or None for a tie) and the seconds taken per move.
+    """
+    rows, cols, k, budget = settings
+    board = ttt.initial_state(rows, cols)
+    latencies = []
+    while not ttt.terminal(board, k):
+        start = time.perf_counter()
+        move = ttt.minimax(board, k, budget)
+        latencies.append(time.perf_counter() - start)
+        board = ttt.result(board, move)
+    return ttt.winner(board, k), latencies
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which `fraction` of the sorted `values` fall.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(latencies, elapsed):
+    """
+    Prints throughput and per-move latency percentiles.
+    """
+    latencies = sorted(latencies)
+    print(f"{len(latencies)} positions in {elapsed:.3f}s, "
+          f"{len(latencies) / elapsed:.1f} positions/sec")
+    if latencies:
+        print("Per move: " + ", ".join(
+            f"p{int(100 * fraction)} {1000 * percentile(latencies, fraction):.2f}ms"
+            for fraction in (0.5, 0.9, 0.99)
+        ) + f", max {1000 * latencies[-1]:.2f}ms")
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("solve", "play"):
+        sys.exit("Usage: python headless.py solve positions [processes]\n"
+                 "       python headless.py play games [processes] [rows] [cols] [k] [budget]")
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+
+    start = time.perf_counter()
+    latencies = []
+    with multiprocessing.Pool(processes) as pool:
+        if sys.argv[1] == "solve":
+            with open(sys.argv[2]) as f:
+                keys = [line.strip() for line in f if line.strip()]
+            for key, value, move, elapsed in pool.imap(solve, keys, chunksize=16):
+                print(f"{key} value={value} move={move}")
+                latencies.append(elapsed)
+        else:
+            rows = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+            cols = int(sys.argv[5]) if len(sys.argv) > 5 else 3
+            k = int(sys.argv[6]) if len(sys.argv) > 6 else None
+            budget = float(sys.argv[7]) if len(sys.argv) > 7 else None
+            settings = (rows, cols, k, budget)
+            outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+            for winner, moves in pool.imap_unordered(play, [settings] * int(sys.argv[2])):
+                outcomes[winner] += 1
+                latencies.extend(moves)
+            print(f"X won {outcomes[ttt.X]}, O won {outcomes[ttt.O]}, tied {outcomes[None]}.")
+    report(latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import sys
 import time
 
 import tictactoe as ttt
+from worker import MoveWorker
 
 pygame.init()
 size = width, height = 600, 400
@@ -19,7 +20,9 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# Searches for AI moves in the background so the window keeps redrawing
+worker = MoveWorker()
 
 while True:
 
@@ -110,13 +113,10 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            worker.start(ttt.minimax, [list(row) for row in board])
+            done, move = worker.poll()
+            if done:
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +141,6 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    worker.cancel()
 
     pygame.display.flip()
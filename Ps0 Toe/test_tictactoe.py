@@ -0,0 +1,129 @@
+"""
+Checks that minimax keeps choosing optimal moves on every reachable
+position, against a plain search with no table, symmetry or book.
+
+Run with: python -m unittest test_tictactoe
+"""
+import unittest
+
+import tictactoe as ttt
+
+# Rows, columns and diagonals of a 3x3 board, as indexes into a flat board
+LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6),
+)
+
+
+def reference_values():
+    """
+    Walks the whole game tree from the empty board without memoizing,
+    and returns the value of every reachable position, keyed by flat
+    tuple. Values are scaled like tictactoe.value: utility times the
+    empty cells left plus two.
+    """
+    values = {}
+
+    def search(cells, turn):
+        empties = cells.count(ttt.EMPTY)
+        won = None
+        for a, b, c in LINES:
+            if cells[a] is not ttt.EMPTY and cells[a] == cells[b] == cells[c]:
+                won = cells[a]
+                break
+        if won is not None:
+            v = (1 if won == ttt.X else -1) * (empties + 2)
+        elif not empties:
+            v = 0
+        else:
+            other = ttt.O if turn == ttt.X else ttt.X
+            children = [
+                search(cells[:i] + (turn,) + cells[i + 1:], other)
+                for i in range(9) if cells[i] is ttt.EMPTY
+            ]
+            v = max(children) if turn == ttt.X else min(children)
+        values[cells] = v
+        return v
+
+    search((ttt.EMPTY,) * 9, ttt.X)
+    return values
+
+
+def flatten(board):
+    return tuple(cell for row in board for cell in row)
+
+
+def unflatten(cells):
+    return [list(cells[i:i + 3]) for i in range(0, 9, 3)]
+
+
+class MinimaxTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.values = reference_values()
+        cls.positions = [
+            cells for cells in cls.values
+            if cells.count(ttt.EMPTY) < 9 and not ttt.terminal(unflatten(cells))
+        ]
+
+    def setUp(self):
+        # Search from scratch: no precomputed table, no book
+        self.saved = (ttt.TABLE_FILE, ttt.BOOK_FILE, ttt.BOOK, ttt.SYMMETRY, dict(ttt.TABLE))
+        ttt.TABLE_FILE = ""
+        ttt.BOOK_FILE = ""
+        ttt.BOOK = None
+        ttt.TABLE.clear()
+
+    def tearDown(self):
+        ttt.TABLE_FILE, ttt.BOOK_FILE, ttt.BOOK, ttt.SYMMETRY, table = self.saved
+        ttt.TABLE.clear()
+        ttt.TABLE.update(table)
+
+    def expected_move(self, cells):
+        """
+        Returns the first move in actions() order with the best
+        reference value for the player to move.
+        """
+        board = unflatten(cells)
+        turn = ttt.player(board)
+        best = None
+        for i, j in ttt.actions(board):
+            child = list(cells)
+            child[3 * i + j] = turn
+            v = self.values[tuple(child)]
+            if best is None or (v > best[0] if turn == ttt.X else v < best[0]):
+                best = (v, (i, j))
+        return best[1]
+
+    def assertOptimal(self):
+        for cells in self.positions:
+            with self.subTest(board=cells):
+                self.assertEqual(
+                    tuple(ttt.minimax(unflatten(cells))), self.expected_move(cells)
+                )
+
+    def test_reachable_positions(self):
+        self.assertEqual(len(self.values), 5478)
+        self.assertEqual(len(self.positions), 4519)
+
+    def test_without_symmetry(self):
+        ttt.SYMMETRY = False
+        self.assertOptimal()
+
+    def test_with_symmetry(self):
+        ttt.SYMMETRY = True
+        self.assertOptimal()
+
+    def test_with_book(self):
+        ttt.BOOK_FILE = self.saved[1]
+        self.assertOptimal()
+
+    def test_opening_move_is_legal(self):
+        board = ttt.initial_state()
+        self.assertIn(ttt.minimax(board), ttt.actions(board))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,20 +8,54 @@ June, 2020.
 
 """
 import util
+import json
 import math
+import os
 import random
+import time
 
 X = "X"
 O = "O"
 EMPTY = None
 
-def initial_state():
+# Transposition table: minimax value of every position searched so far, by canonical(board)
+TABLE = {}
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "minimax_table.json")
+
+# Solved 3x3 game written by book.py: one signed value byte per position index,
+# then a little-endian 16-bit mask of best moves per position index
+BOOK = None
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solved.bin")
+POSITIONS = 3 ** 9
+UNREACHABLE = 127
+
+# Whether to search each class of positions equal up to rotation and reflection only once
+SYMMETRY = True
+
+# Cell permutations for the symmetries of each board shape, by (rows, cols)
+SYMMETRIES = {}
+
+# Seconds the depth-limited search may spend on a move, for boards larger than 3x3
+BUDGET = 1.0
+
+# Directions a winning line can run in: across, down, and both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# Every winning line of each board shape, by (rows, cols, k)
+LINES = {}
+
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
+
+def default_k(board):
+    """
+    Returns how many marks in a row win on this board when not given:
+    the length of the board's shorter side, but at most five.
+    """
+    return min(len(board), len(board[0]), 5)
 
 def player(board):
     """
@@ -47,7 +81,7 @@ def actions(board):
     """
     actions = []
     for i in range (len(board)):
-        for j in range (3):
+        for j in range (len(board[i])):
             if board[i][j] is EMPTY:
                 actions.append((i, j))
     return actions
@@ -71,43 +105,46 @@ def result(board, action):
         newboard[i][j] = mark
     return newboard
 
-def winner(board):
+def winner(board, k=None):
     """
     Returns the winner of the game, if there is one.
+    A player wins with k of their marks in a row, column or diagonal.
+    """
+    found = None
+    for line in lines(len(board), len(board[0]), k or default_k(board)):
+        i, j = line[0]
+        mark = board[i][j]
+        if mark is EMPTY or found == mark:
+            continue
+        for a, b in line:
+            if board[a][b] != mark:
+                break
+        else:
+            if mark == X:
+                return X
+            found = mark
+    return found
+
+def lines(rows, cols, k):
     """
-    #check if X wins by row.
-    for i in range (3):
-        if board[i][0] == X and board[i][1] == X and board[i][2] == X:
-            return X
-    #check for X win by column
-    for j in range (3):
-        if board [0][j] == X and board [1][j] == X and board [2][j] == X:
-            return X
-    #check for win by diaganol
-    if board [0][0] == X and board [1][1] == X and board [2][2] == X:
-        return X
-    if board [0][2] == X and board [1][1] == X and board [2][0] == X:
-        return X
-    #check if O wins by row.
-    for i in range (3):
-        if board[i][0] == O and board[i][1] == O and board[i][2] == O:
-            return O
-    #check for O win by column
-    for j in range (3):
-        if board [0][j] == O and board [1][j] == O and board [2][j] == O:
-            return O
-    #check for win by diaganol
-    if board [0][0] == O and board [1][1] == O and board [2][2] == O:
-        return O
-    if board [0][2] == O and board [1][1] == O and board [2][0] == O:
-        return O
-    return None
-
-def terminal(board):
+    Returns every run of k cells in a row, column or diagonal
+    of a rows x cols board, as tuples of (i, j) cells.
+    """
+    if (rows, cols, k) not in LINES:
+        LINES[rows, cols, k] = [
+            tuple((i + s * di, j + s * dj) for s in range(k))
+            for i in range(rows)
+            for j in range(cols)
+            for di, dj in DIRECTIONS
+            if 0 <= i + (k - 1) * di < rows and 0 <= j + (k - 1) * dj < cols
+        ]
+    return LINES[rows, cols, k]
+
+def terminal(board, k=None):
     """
     Returns True if game is over, False otherwise.
     """
-    terminal = winner(board)
+    terminal = winner(board, k)
     movesleft = actions(board)
 
     if terminal == None and len(movesleft) != 0:
@@ -115,11 +152,11 @@ def terminal(board):
     else:
         return True
 
-def utility(board):
+def utility(board, k=None):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    utility = winner (board)
+    utility = winner (board, k)
     if utility == X:
         return 1
     if utility == O:
@@ -127,63 +164,516 @@ def utility(board):
     else:
         return 0
 
-def minimax(board):
+class GameState():
+    """
+    A board being searched, updated in place as moves are made and
+    taken back. It carries the move count, the last move and the winner,
+    so checking for the end of the game or its utility is O(1), and
+    finding the winner after a move only looks at lines through that move.
+    """
+
+    def __init__(self, board, k=None):
+        self.board = [list(row) for row in board]
+        self.k = k or default_k(board)
+        self.rows = len(board)
+        self.cols = len(board[0])
+        self.count = self.rows * self.cols - len(actions(board))
+        self.turn = player(board)
+        self.winner = winner(board, self.k)
+        self.last = None
+        self.history = []
+
+    def empties(self):
+        return self.rows * self.cols - self.count
+
+    def terminal(self):
+        return self.winner is not None or self.count == self.rows * self.cols
+
+    def utility(self):
+        if self.winner == X:
+            return 1
+        if self.winner == O:
+            return -1
+        return 0
+
+    def push(self, action):
+        """
+        Makes move (i, j) for the player whose turn it is.
+        """
+        i, j = action
+        if self.board[i][j] is not EMPTY:
+            raise Exception ('Action not valid.')
+        mark = self.turn
+        self.board[i][j] = mark
+        self.history.append((action, self.winner, self.last))
+        # Like winner(), a line for X counts first if both players have one
+        if self.completes_line(i, j) and (self.winner is None or mark == X):
+            self.winner = mark
+        self.count += 1
+        self.last = action
+        self.turn = O if mark == X else X
+
+    def pop(self):
+        """
+        Takes back the last move made with push.
+        """
+        (i, j), self.winner, self.last = self.history.pop()
+        self.board[i][j] = EMPTY
+        self.count -= 1
+        self.turn = O if self.turn == X else X
+
+    def completes_line(self, i, j):
+        """
+        Returns True if the mark at (i, j) is part of k in a row.
+        """
+        mark = self.board[i][j]
+        for di, dj in DIRECTIONS:
+            run = 1
+            for sign in (1, -1):
+                a, b = i + sign * di, j + sign * dj
+                while 0 <= a < self.rows and 0 <= b < self.cols and self.board[a][b] == mark:
+                    run += 1
+                    a, b = a + sign * di, b + sign * dj
+            if run >= self.k:
+                return True
+        return False
+
+
+def minimax(board, k=None, budget=None):
     """
     Returns the optimal action for the current player on the board.
+
+    Standard 3x3 games are searched exactly. Larger boards, other values
+    of k, or an explicit time budget use the depth-limited `deepening`
+    search, which always replies within the budget.
     """
+    k = k or default_k(board)
+    if (len(board), len(board[0]), k) != (3, 3, 3) or budget is not None:
+        return deepening(board, k, BUDGET if budget is None else budget)
+
     depth = len (actions(board))
     if depth == 9:
         return random.choice(actions(board))
+    move = book_move(board)
+    if move is not None:
+        return move
+    if not TABLE:
+        load_table()
 
-    def maxi (board, depth):
-        # print (f'Maxi called at depth {depth} with board:')
-        # printv(board)
-        if terminal (board) or depth == 0:
-            return utility(board) * (depth + 1)
-        v = -math.inf
-        for move in actions(board):
-            v= max(v, mini(result(board,move), depth-1))
-        return v
-
-    def mini (board, depth):
-        # print (f'Mini called at depth {depth} with board:')
-        # printv(board)
-        if terminal (board) or depth == 0:
-            return utility(board) * (depth + 1)
-        v = math.inf
-        for move in actions(board):
-            v = min (v, maxi(result(board,move), depth-1))
-        return v
+    # Only the first move of each symmetry class is searched. It is already
+    # in the board's real orientation, and it is the one minimax would pick
+    # among the class, since all of them share the same value.
+    bmove = ()
+    if player(board) == X:  # Maximizing player.
+        maxval = -math.inf
+        for move, child, key in distinct_children(board):
+            moveval = value(child, key)
+            if moveval > maxval:
+                maxval = moveval
+                bmove = move
+    if player(board) == O:  #Minimizing player.
+        minval = math.inf
+        for move, child, key in distinct_children(board):
+            moveval = value(child, key)
+            if moveval < minval:
+                minval = moveval
+                bmove = move
+    return bmove
+
+
+def value(board, key=None):
+    """
+    Returns the minimax value of the board: the utility of the final
+    position with best play, scaled by the empty cells left plus two,
+    so faster wins and slower losses are preferred.
+
+    Values are kept in TABLE, shared across moves and games,
+    under `key` if the caller already knows the board's key.
+    """
+    if key is None:
+        key = canonical(board) if SYMMETRY else encode(board)
+    if key in TABLE:
+        return TABLE[key]
+    return state_value(GameState(board), key)
+
+
+def state_value(state, key):
+    """
+    Returns the minimax value of the state's board, whose TABLE key is
+    `key`, searching by making and taking back moves on the state.
+    """
+    if key in TABLE:
+        return TABLE[key]
+    if state.terminal():
+        v = state.utility() * (state.empties() + 2)
+    else:
+        maximizing = state.turn == X
+        v = -math.inf if maximizing else math.inf
+        seen = set()
+        for move in actions(state.board):
+            state.push(move)
+            child = canonical(state.board) if SYMMETRY else encode(state.board)
+            if child not in seen:
+                seen.add(child)
+                child_value = state_value(state, child)
+                v = max(v, child_value) if maximizing else min(v, child_value)
+            state.pop()
+    TABLE[key] = v
+    return v
+
+
+def distinct_children(board):
+    """
+    Returns (action, resulting board, table key) triples for the available
+    actions. With SYMMETRY on, keeps only the first action, in actions()
+    order, of those leading to positions that are rotations or reflections
+    of one another.
+    """
+    if not SYMMETRY:
+        return [(move, result(board, move), None) for move in actions(board)]
+    distinct = []
+    seen = set()
+    for move in actions(board):
+        child = result(board, move)
+        key = canonical(child)
+        if key not in seen:
+            seen.add(key)
+            distinct.append((move, child, key))
+    return distinct
+
+
+def canonical(board):
+    """
+    Returns the smallest encoding of the board among all its rotations
+    and reflections, so symmetric positions share a single key.
+    """
+    cells = [cell or "-" for row in board for cell in row]
+    rows, cols = len(board), len(board[0])
+    flat = min("".join([cells[k] for k in permutation]) for permutation in symmetries(rows, cols))
+    return "/".join(flat[i:i + cols] for i in range(0, len(flat), cols))
+
+
+def symmetries(rows, cols):
+    """
+    Returns the symmetries of a rows x cols board as permutations,
+    listing for each cell of the transformed board the index of the
+    original cell it comes from: rotations and reflections for square
+    boards, just the flips and half turn otherwise.
+    """
+    if (rows, cols) not in SYMMETRIES:
+        transforms = [
+            lambda i, j: (i, j),
+            lambda i, j: (rows - 1 - i, j),
+            lambda i, j: (i, cols - 1 - j),
+            lambda i, j: (rows - 1 - i, cols - 1 - j),
+        ]
+        if rows == cols:
+            transforms += [
+                lambda i, j: (j, i),
+                lambda i, j: (cols - 1 - j, i),
+                lambda i, j: (j, rows - 1 - i),
+                lambda i, j: (cols - 1 - j, rows - 1 - i),
+            ]
+        SYMMETRIES[rows, cols] = [
+            [a * cols + b for i in range(rows) for j in range(cols) for a, b in [transform(i, j)]]
+            for transform in transforms
+        ]
+    return SYMMETRIES[rows, cols]
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action for the current player on the board,
+    using alpha-beta pruning with move ordering instead of visiting
+    every child. Chooses the same move as minimax.
+    """
+    depth = len (actions(board))
+    if depth == 9:
+        return random.choice(actions(board))
 
+    # Root moves are tried in minimax's order, each with the best value so far
+    # as its bound, so ties break the same way minimax breaks them.
     bmove = ()
     if player(board) == X:  # Maximizing player.
         maxval = -math.inf
         for move in actions(board):
-            # print (f'Trying {move}')
-            moveval = mini (result(board, move), depth)
-            # print (f'Move value: {moveval}')
+            moveval = ab_value(GameState(result(board, move)), maxval, math.inf)
             if moveval > maxval:
-                # print (f'Adjusting maxval {maxval} to {moveval}')
                 maxval = moveval
                 bmove = move
     if player(board) == O:  #Minimizing player.
         minval = math.inf
         for move in actions(board):
-            # print(f'Trying {move}')
-            moveval = maxi (result(board,move), depth)
-            # print(f'Move value: {moveval}')
+            moveval = ab_value(GameState(result(board, move)), -math.inf, minval)
             if moveval < minval:
-                # print (f'Adjusting minval {minval} to {moveval}.')
                 minval = moveval
                 bmove = move
     return bmove
 
 
+def ab_value(state, alpha, beta):
+    """
+    Returns the minimax value of the state if it lies strictly between
+    alpha and beta, otherwise a bound on the far side of the window.
+    """
+    if state.terminal():
+        return state.utility() * (state.empties() + 2)
+    if state.turn == X:
+        v = -math.inf
+        for move in ordered_actions(state.board):
+            state.push(move)
+            v = max(v, ab_value(state, alpha, beta))
+            state.pop()
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+    else:
+        v = math.inf
+        for move in ordered_actions(state.board):
+            state.push(move)
+            v = min(v, ab_value(state, alpha, beta))
+            state.pop()
+            beta = min(beta, v)
+            if alpha >= beta:
+                break
+    return v
+
+
+def ordered_actions(board):
+    """
+    Returns the available actions, most promising first: winning moves,
+    then moves blocking an opponent's win, then center, corners, edges.
+    """
+    mark = player(board)
+    other = O if mark == X else X
+
+    def priority(move):
+        i, j = move
+        if completes_line(board, move, mark):
+            return 0
+        if completes_line(board, move, other):
+            return 1
+        if (i, j) == (1, 1):
+            return 2
+        if i != 1 and j != 1:
+            return 3
+        return 4
+
+    return sorted(actions(board), key=priority)
+
+
+def completes_line(board, move, mark):
+    """
+    Returns True if placing `mark` at `move` wins the game for `mark`.
+    """
+    i, j = move
+    board = [list(row) for row in board]
+    board[i][j] = mark
+    return winner(board) == mark
+
+
+class Timeout(Exception):
+    """
+    Raised inside the depth-limited search when its budget runs out.
+    """
+
+
+def deepening(board, k, budget):
+    """
+    Returns the best action found by iterative-deepening alpha-beta
+    search within `budget` seconds: the search runs one, two, three...
+    moves deep, scoring the positions where it stops with `evaluate`,
+    and the move from the deepest search to finish is returned.
+    A lone candidate is returned at once, without searching.
+    """
+    deadline = time.perf_counter() + budget
+    moves = candidate_actions(board)
+    if not moves:
+        return ()
+    bmove = moves[0]
+    if len(moves) == 1:
+        return bmove
+    maximizing = player(board) == X
+
+    for depth in range(1, len(actions(board)) + 1):
+        state = GameState(board, k)
+        try:
+            scores = {}
+            for move in moves:
+                state.push(move)
+                scores[move] = limited_value(state, depth - 1, -math.inf, math.inf, deadline)
+                state.pop()
+        except Timeout:
+            break
+        # Search the best move first next time, to prune the rest sooner
+        moves.sort(key=lambda move: -scores[move] if maximizing else scores[move])
+        bmove = moves[0]
+        if abs(scores[bmove]) >= WIN:
+            break
+    return bmove
+
+
+# Score for a won position in the depth-limited search, above any `evaluate` score
+WIN = 10 ** 12
+
+
+def limited_value(state, depth, alpha, beta, deadline):
+    """
+    Returns the alpha-beta value of the state searched `depth` moves
+    deeper, using `evaluate` for positions where the search stops.
+    Raises Timeout once the deadline has passed.
+    """
+    if time.perf_counter() > deadline:
+        raise Timeout
+    if state.terminal():
+        # Prefer quicker wins and slower losses
+        return (WIN + state.empties()) * state.utility()
+    if depth == 0:
+        return evaluate(state.board, state.k)
+
+    if state.turn == X:
+        v = -math.inf
+        for move in candidate_actions(state.board):
+            state.push(move)
+            v = max(v, limited_value(state, depth - 1, alpha, beta, deadline))
+            state.pop()
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+    else:
+        v = math.inf
+        for move in candidate_actions(state.board):
+            state.push(move)
+            v = min(v, limited_value(state, depth - 1, alpha, beta, deadline))
+            state.pop()
+            beta = min(beta, v)
+            if alpha >= beta:
+                break
+    return v
+
+
+def candidate_actions(board):
+    """
+    Returns the actions worth searching, nearest the center first.
+    On boards with more than 16 cells, only empty cells next to a mark
+    are considered (or the center, on an empty board).
+    """
+    rows, cols = len(board), len(board[0])
+    moves = actions(board)
+    if rows * cols > 16:
+        near = [
+            (i, j) for i, j in moves
+            if any(
+                board[a][b] is not EMPTY
+                for a in range(max(i - 1, 0), min(i + 2, rows))
+                for b in range(max(j - 1, 0), min(j + 2, cols))
+            )
+        ]
+        moves = near or [(rows // 2, cols // 2)]
+    center_i, center_j = (rows - 1) / 2, (cols - 1) / 2
+    moves.sort(key=lambda move: abs(move[0] - center_i) + abs(move[1] - center_j))
+    return moves
+
 
+def evaluate(board, k):
+    """
+    Heuristic value of a position for X: every run of k cells that
+    holds marks of only one player scores 10 to the number of those
+    marks, positive for X and negative for O.
+    """
+    score = 0
+    for line in lines(len(board), len(board[0]), k):
+        marks = [board[i][j] for i, j in line]
+        xs = marks.count(X)
+        os_ = marks.count(O)
+        if xs and not os_:
+            score += 10 ** xs
+        elif os_ and not xs:
+            score -= 10 ** os_
+    return score
 
 
+def encode(board):
+    """
+    Returns a string key for the board, one character per cell
+    and rows separated by slashes, e.g. "X-O/-X-/--O".
+    """
+    return "/".join("".join(cell or "-" for cell in row) for row in board)
 
 
+def decode(key):
+    """
+    Returns the board for a string made by encode.
+    """
+    marks = {"X": X, "O": O, "-": EMPTY}
+    return [[marks[cell] for cell in row] for row in key.split("/")]
 
 
+def position_index(board):
+    """
+    Returns the index of a 3x3 board in the solved-game book,
+    reading cells as base-3 digits: 0 empty, 1 X, 2 O.
+    """
+    index = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            index = index * 3 + (1 if cell == X else 2 if cell == O else 0)
+    return index
+
+
+def load_book(path=None):
+    """
+    Loads the solved-game book into BOOK, or an empty book
+    if the file has not been generated.
+    """
+    global BOOK
+    path = path if path is not None else BOOK_FILE
+    BOOK = b""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) == 3 * POSITIONS:
+            BOOK = data
+
+
+def book_move(board):
+    """
+    Returns minimax's move for a 3x3 board from the solved-game book:
+    the first best move in actions() order. Returns None if the book
+    is missing or does not cover the board, and () if no move is left.
+    """
+    if BOOK is None:
+        load_book()
+    if not BOOK:
+        return None
+    index = position_index(board)
+    if BOOK[index] == UNREACHABLE:
+        return None
+    mask = BOOK[POSITIONS + 2 * index] | BOOK[POSITIONS + 2 * index + 1] << 8
+    if not mask:
+        return ()
+    return divmod((mask & -mask).bit_length() - 1, 3)
+
+
+def load_table(path=None):
+    """
+    Loads precomputed values into TABLE, if the file exists.
+    """
+    path = path or TABLE_FILE
+    if os.path.exists(path):
+        with open(path) as f:
+            TABLE.update(json.load(f))
+
+
+def save_table(path=None):
+    """
+    Writes TABLE to a file for later runs to load.
+    """
+    with open(path or TABLE_FILE, "w") as f:
+        json.dump(TABLE, f, separators=(",", ":"), sort_keys=True)
+
 
+if __name__ == "__main__":
+    value(initial_state())
+    save_table()
+    print(f"Saved {len(TABLE)} positions to {TABLE_FILE}.")
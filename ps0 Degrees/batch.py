@@ -0,0 +1,118 @@
+"""
+Answers many degrees-of-separation queries from a file.
+
+Usage: python batch.py directory pairs [output] [processes]
+
+`pairs` is either a CSV file with `source` and `target` columns or a
+JSONL file (.jsonl) of {"source": ..., "target": ...} objects, where each
+value is a person ID or an unambiguous name. Results are written as JSONL,
+one line per pair in input order, to `output` or standard output.
+
+The graph is loaded once as a memory-mapped snapshot before the worker
+processes are forked, so every worker shares the same pages, along with
+any lookup table built on first use.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from graph import NamesView, load_graph
+
+# Set in the parent before forking, or by `initialize` in each worker
+graph = None
+names = None
+
+
+def initialize(directory):
+    """
+    Loads the graph in a worker that did not inherit it via fork.
+    """
+    global graph, names
+    if graph is None:
+        graph = load_graph(directory)
+        names = NamesView(graph)
+
+
+def read_pairs(path):
+    """
+    Yields (source, target) pairs from a CSV or JSONL file.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield str(row["source"]), str(row["target"])
+        else:
+            for row in csv.DictReader(f):
+                yield row["source"], row["target"]
+
+
+def resolve(person):
+    """
+    Returns the person ID for an ID or a name.
+    Raises ValueError if the name is unknown or ambiguous.
+    """
+    if graph.person_index(person) is not None:
+        return person
+    person_ids = names.get(person.lower(), set())
+    if len(person_ids) != 1:
+        reason = "unknown" if not person_ids else "ambiguous"
+        raise ValueError(f"{reason} person: {person}")
+    return next(iter(person_ids))
+
+
+def answer(pair):
+    """
+    Answers a single (source, target) query.
+    Returns the result record for the output file.
+    """
+    source, target = pair
+    record = {"source": source, "target": target}
+    start = time.perf_counter()
+    try:
+        path = graph.shortest_path(resolve(source), resolve(target))
+    except ValueError as e:
+        record["error"] = str(e)
+    else:
+        record["degrees"] = None if path is None else len(path)
+        record["path"] = path
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def main():
+    if not 3 <= len(sys.argv) <= 5:
+        sys.exit("Usage: python batch.py directory pairs [output] [processes]")
+    directory = sys.argv[1]
+    pairs = sys.argv[2]
+    output = sys.argv[3] if len(sys.argv) > 3 else "-"
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else os.cpu_count()
+
+    # Load in the parent, and make the first ID and name lookups there,
+    # so any table they build lazily is inherited by the forked workers
+    initialize(directory)
+    graph.person_index("")
+    names.get("")
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+    out = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    count = 0
+    with context.Pool(processes, initializer=initialize, initargs=(directory,)) as pool:
+        for record in pool.imap(answer, read_pairs(pairs), chunksize=64):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            count += 1
+    elapsed = time.perf_counter() - start
+    if out is not sys.stdout:
+        out.close()
+    print(f"Answered {count} pairs in {elapsed:.3f}s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
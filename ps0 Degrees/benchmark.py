@@ -0,0 +1,171 @@
+"""
+Compares search strategies for degrees of separation on random pairs.
+
+Usage: python benchmark.py [directory] [pairs] [seed]
+
+For every strategy, reports the number of people expanded (calls to
+neighbors_for_person) and the total wall time, and checks that every
+path found is valid and as short as a plain reference BFS says it can be,
+exiting with status 1 if any is not. Pass `all` as pairs to check every
+ordered pair, e.g. on the small dataset.
+Also compares the memory used and neighbor iteration speed of the dicts
+against the compact graph.
+"""
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import degrees
+from graph import CompactGraph
+
+
+def reference_distance(source, target):
+    """
+    Plain textbook BFS over the people and movies dicts, goal-testing
+    on removal. Returns the number of degrees, or None if not connected.
+    """
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        if person_id == target:
+            return distances[person_id]
+        for movie_id in degrees.people[person_id]["movies"]:
+            for neighbor in degrees.movies[movie_id]["stars"]:
+                if neighbor not in distances:
+                    distances[neighbor] = distances[person_id] + 1
+                    queue.append(neighbor)
+    return None
+
+
+def valid(path, source, target):
+    """
+    Checks that every step of `path` is a movie shared by
+    the person before it and the person it reaches.
+    """
+    person_id = source
+    for movie_id, next_person in path:
+        stars = degrees.movies[movie_id]["stars"]
+        if person_id not in stars or next_person not in stars:
+            return False
+        person_id = next_person
+    return person_id == target
+
+
+def strategies(graph):
+    """
+    Returns the search functions to compare, by name.
+    """
+    return {
+        "bfs": degrees.shortest_path,
+        "bidirectional": degrees.bidirectional_path,
+        "cached": degrees.cached_path,
+        "compact": graph.shortest_path,
+    }
+
+
+def measure(load):
+    """
+    Calls `load` and returns its result along with the
+    seconds taken and bytes of memory still allocated.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def compare_graphs(directory):
+    """
+    Loads the dataset both ways, reporting load time and memory,
+    then times one full neighbor pass over every person.
+    Returns the compact graph.
+    """
+    _, elapsed, size = measure(lambda: degrees.load_data(directory))
+    print(f"{'dicts':>14}: loaded in {elapsed:.3f}s, {size / 2 ** 20:.1f} MiB")
+    graph, elapsed, size = measure(lambda: CompactGraph.from_csv(directory))
+    print(f"{'compact':>14}: loaded in {elapsed:.3f}s, {size / 2 ** 20:.1f} MiB")
+
+    start = time.perf_counter()
+    for person_id in degrees.people:
+        for _ in degrees.neighbors_for_person(person_id):
+            pass
+    print(f"{'dicts':>14}: neighbor pass in {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    for p in range(len(graph.person_ids)):
+        for _ in graph.neighbors(p):
+            pass
+    print(f"{'compact':>14}: neighbor pass in {time.perf_counter() - start:.3f}s")
+    return graph
+
+
+def count_expansions():
+    """
+    Wraps degrees.neighbors_for_person so every call is counted.
+    Returns the counter, a one-item list that callers reset and read.
+    """
+    counter = [0]
+    neighbors = degrees.neighbors_for_person
+
+    def counting(person_id):
+        counter[0] += 1
+        return neighbors(person_id)
+
+    degrees.neighbors_for_person = counting
+    return counter
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python benchmark.py [directory] [pairs] [seed]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    count = sys.argv[2] if len(sys.argv) > 2 else "100"
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    print("Loading data...")
+    graph = compare_graphs(directory)
+    print("Data loaded.")
+
+    people = sorted(degrees.people)
+    if count == "all":
+        pairs = list(itertools.permutations(people, 2))
+    else:
+        rng = random.Random(seed)
+        pairs = [tuple(rng.sample(people, 2)) for _ in range(int(count))]
+    expected = [reference_distance(source, target) for source, target in pairs]
+
+    counter = count_expansions()
+    failed = False
+    for name, search in strategies(graph).items():
+        counter[0] = 0
+        paths = []
+        start = time.perf_counter()
+        for source, target in pairs:
+            paths.append(search(source, target))
+        elapsed = time.perf_counter() - start
+        expanded = f"{counter[0]} people expanded" if counter[0] else "n/a expanded"
+        print(f"{name:>14}: {expanded}, "
+              f"{elapsed:.3f}s total, {1000 * elapsed / len(pairs):.2f}ms per pair")
+
+        wrong = 0
+        for (source, target), path, distance in zip(pairs, paths, expected):
+            if path is None:
+                wrong += distance is not None
+            else:
+                wrong += len(path) != distance or not valid(path, source, target)
+        if wrong:
+            print(f"{name:>14}: {wrong} of {len(pairs)} paths missing, invalid or not shortest!")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import csv
+import os
 import sys
+from collections import OrderedDict
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import MoviesView, NamesView, PeopleView, load_graph
+from nameindex import NameIndex
+from util import Node, StackFrontier, QueueFrontier, SearchStats
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,54 +16,190 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph behind the three maps above, when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Maps source person_ids to their single-source BFS tables, least recently used first.
+# Tables are dropped once together they take more than TABLE_CACHE_BYTES,
+# estimating TABLE_ENTRY_BYTES per person in a dict table (measured on `large`)
+tables = OrderedDict()
+TABLE_CACHE_BYTES = 256 * 2 ** 20
+TABLE_ENTRY_BYTES = 100
+
+# NameIndex over `names`, built by the first call to find_people
+name_index = None
+
+
+def load_data(directory, compact=False):
     """
     Load data from CSV files into memory.
+    Returns the number of stars rows naming an unknown person or movie.
+
+    With compact=True, memory-map a binary snapshot of the data instead,
+    rebuilding the snapshot first if any CSV file is newer than it, and
+    make `names`, `people` and `movies` read-only views over it. The
+    orphan count is then the one recorded when the snapshot was built.
     """
+    global graph, names, people, movies, name_index
+    tables.clear()
+    name_index = None
+    if compact:
+        graph = load_graph(directory)
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        return graph.orphans
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+        add_people(csv.DictReader(f))
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        add_movies(csv.DictReader(f))
+
+    # Load stars
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        return add_stars(csv.DictReader(f))[1]
+
+
+def ingest(directory):
+    """
+    Streams a delta of new rows into the loaded data without reloading it.
+    `directory` may hold any of people.csv, movies.csv and stars.csv.
+
+    Only the cached BFS tables that the new credits actually change are
+    dropped. Returns a dict counting the people, movies and stars rows
+    read, and the stars rows orphaned by an unknown person or movie.
+    """
+    if graph is not None:
+        raise Exception("Cannot ingest into a compact snapshot, load without compact=True.")
+
+    counts = {"people": 0, "movies": 0, "stars": 0, "orphans": 0}
+    for kind, add in (("people", add_people), ("movies", add_movies)):
+        path = os.path.join(directory, f"{kind}.csv")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                counts[kind] = add(csv.DictReader(f))
+
+    path = os.path.join(directory, "stars.csv")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            counts["stars"], counts["orphans"] = add_stars(csv.DictReader(f), invalidate=True)
+    return counts
+
+
+def add_people(rows):
+    """
+    Adds or updates people from rows with id, name and birth.
+    Returns the number of rows read.
+    """
+    global name_index
+    count = 0
+    for row in rows:
+        person = people.get(row["id"])
+        if person is None:
             people[row["id"]] = {
                 "name": row["name"],
                 "birth": row["birth"],
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+        else:
+            names[person["name"].lower()].discard(row["id"])
+            person["name"] = row["name"]
+            person["birth"] = row["birth"]
+        if row["name"].lower() not in names:
+            names[row["name"].lower()] = {row["id"]}
+        else:
+            names[row["name"].lower()].add(row["id"])
+        count += 1
+    if count:
+        name_index = None
+    return count
 
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+
+def add_movies(rows):
+    """
+    Adds or updates movies from rows with id, title and year.
+    Returns the number of rows read.
+    """
+    count = 0
+    for row in rows:
+        movie = movies.get(row["id"])
+        if movie is None:
             movies[row["id"]] = {
                 "title": row["title"],
                 "year": row["year"],
                 "stars": set()
             }
+        else:
+            movie["title"] = row["title"]
+            movie["year"] = row["year"]
+        count += 1
+    return count
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+
+def add_stars(rows, invalidate=False):
+    """
+    Adds credits from rows with person_id and movie_id.
+    Returns the number of rows read and the number of those
+    orphaned by an unknown person or movie.
+
+    With invalidate=True, also drops every cached BFS table
+    in which a new credit changes some distance.
+    """
+    count = 0
+    orphans = 0
+    for row in rows:
+        count += 1
+        person_id = row["person_id"]
+        movie_id = row["movie_id"]
+        if person_id not in people or movie_id not in movies:
+            orphans += 1
+            continue
+        stars = movies[movie_id]["stars"]
+        if person_id in stars:
+            continue
+        if invalidate:
+            invalidate_tables(person_id, stars)
+        people[person_id]["movies"].add(movie_id)
+        stars.add(person_id)
+    return count, orphans
+
+
+def invalidate_tables(person_id, costars):
+    """
+    Drops the cached BFS tables that stop being correct once `person_id`
+    is linked to every person in `costars`. A new link only changes a
+    table if it reaches a person the table could not reach before, or
+    joins two people whose distances differ by more than one.
+    """
+    for source, table in list(tables.items()):
+        distance = table.get(person_id, (None,))[0]
+        for costar in costars:
+            other = table.get(costar, (None,))[0]
+            if distance is None and other is None:
+                continue
+            if distance is None or other is None or abs(distance - other) > 1:
+                del tables[source]
+                break
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=compact)
     print("Data loaded.")
 
     again = True
@@ -74,7 +214,10 @@ def main():
             print("Person not found.")
             target = person_id_for_name(input("Name: "))
         print (f'Looking or degrees of separation between: {people[source]["name"]} and {people[target]["name"]}.')
-        path = shortest_path(source, target)
+        if graph is not None:
+            path = graph.shortest_path(source, target)
+        else:
+            path = shortest_path(source, target)
 
         if path is None:
             print("Not connected.")
@@ -93,67 +236,242 @@ def main():
             again = False
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
     node.state will be an actor, and node.action will be the movie taken to get from one actor to the next.
+
+    Each person's neighbors are generated once, and the goal test runs as
+    children are generated, so the search stops one layer earlier than
+    testing on removal would. Every person ever added to the frontier is
+    kept in `reached`, so no one is added twice.
+
+    If `stats` is a SearchStats, it is updated as the search runs.
     """
+    if source == target:
+        return []
 
     # Initialize frontier to just the starting actor
-    start = Node(state=(source), parent=None, action=None)
+    start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
     frontier.add(start)
 
-    # Initialize an empty explored set
-    explored = set()
+    # Everyone explored or waiting in the frontier
+    reached = {source}
 
-    while True:
-
-        # If nothing left in frontier, then no path
-        if frontier.empty():
-            raise Exception("No solution.")
+    while not frontier.empty():
 
         # Choose a node from the frontier
         node = frontier.remove()
-        #print (f'Node popped: {node.state}')
-        # check for target in film node.
-        explored.add(node.state)
-
-        # if node.state == target:
-        #     solution = []
-        #     while node.parent is not None:
-        #         solution.append((node.action, node.state))
-        #         node = node.parent
-        #     solution.reverse()
-        #     return solution
-        neighbors = []
-        for movie, actor in neighbors_for_person(node.state):
-            if actor not in neighbors:
-                neighbors.append(actor)
-
-            if target in neighbors:
-                solution = []
-                solution.append ((movie, target))
-                while node.parent is not None:
-                    solution.append((node.action, node.state))
-                    node = node.parent
-                solution.reverse()
-                return solution
-
-        nodecounter=0
-        for movie, actor in neighbors_for_person(node.state):
-            if not frontier.contains_state(actor) and actor not in explored:
-                child = Node(state=actor, parent=node, action=movie)
-                frontier.add(child)
-                nodecounter += 1
-        # currentFrontier=[]
-        # for item in frontier.frontier:
-        #     currentFrontier.append(people[item.state]['name'])
-        #print(f'Frontier: {currentFrontier}')
-        #print(f'Frontier contains {len(currentFrontier)} Nodes.')
+        if stats is None:
+            neighbors = neighbors_for_person(node.state)
+        else:
+            stats.expand(node)
+            clock = stats.start_neighbors()
+            neighbors = neighbors_for_person(node.state)
+            stats.stop_neighbors(clock)
+
+        for movie, actor in neighbors:
+            if actor in reached:
+                if stats is not None:
+                    stats.dedup_hits += 1
+                continue
+            child = Node(state=actor, parent=node, action=movie)
+            if actor == target:
+                return solution(child)
+            reached.add(actor)
+            frontier.add(child)
+
+        if stats is not None:
+            stats.frontier_size(len(frontier.frontier))
+
+    # If nothing left in frontier, then no path
+    return None
+
+
+def solution(node):
+    """
+    Returns the list of (movie_id, person_id) pairs
+    leading from the root of the search to `node`.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def shortest_path_with_stats(source, target, on_expand=None):
+    """
+    Runs shortest_path with instrumentation enabled.
+    Returns the path (or None) and the SearchStats for the search.
+    """
+    stats = SearchStats(on_expand)
+    return shortest_path(source, target, stats), stats
+
+
+def bidirectional_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outward from
+    both ends at once and joining the two frontiers where they meet.
+
+    Each round expands one whole layer of whichever frontier is smaller,
+    so the two searches take turns without either side running away.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Map each reached person to the (movie_id, person_id) step that
+    # reached them, pointing back toward the side's starting person.
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward, backward)
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward, forward)
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_layer(layer, parents, others):
+    """
+    Expands every person in `layer` by one step, recording parents.
+    Returns the next layer and the first person also reached by the
+    other search, or None if the frontiers have not met yet.
+    """
+    next_layer = []
+    for person_id in layer:
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            if neighbor in others:
+                return next_layer, neighbor
+            next_layer.append(neighbor)
+    return next_layer, None
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the forward and backward parent chains at `meeting` into
+    a single list of (movie_id, person_id) pairs from source to target.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        path.append((movie_id, child))
+        person_id = child
+    return path
+
+
+def distance_table(source):
+    """
+    Returns the BFS table for `source`, mapping every person connected to
+    the source to a (distance, movie_id, parent person_id) triple.
+    The source itself maps to (0, None, None).
+
+    The most recently used tables are kept, up to TABLE_CACHE_BYTES, so
+    repeated queries from popular sources skip the search entirely.
+
+    With a compact graph loaded, the table is instead the integer arrays
+    returned by CompactGraph.distance_table, read by path_from_table.
+    """
+    if source in tables:
+        tables.move_to_end(source)
+        return tables[source]
+
+    if graph is not None:
+        p = graph.person_index(source)
+        if p is None:
+            raise KeyError(source)
+        return cache_table(source, graph.distance_table(p))
+
+    table = {source: (0, None, None)}
+    layer = [source]
+    distance = 0
+    while layer:
+        distance += 1
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in table:
+                    table[neighbor] = (distance, movie_id, person_id)
+                    next_layer.append(neighbor)
+        layer = next_layer
+    return cache_table(source, table)
+
+
+def cache_table(source, table):
+    """
+    Adds a BFS table to the cache, dropping the least recently used
+    tables while the cache is over TABLE_CACHE_BYTES, and returns it.
+    The newest table is always kept.
+    """
+    tables[source] = table
+    while len(tables) > 1 and sum(map(table_bytes, tables.values())) > TABLE_CACHE_BYTES:
+        tables.popitem(last=False)
+    return table
+
+
+def table_bytes(table):
+    """
+    Returns the approximate memory taken by a BFS table.
+    """
+    if isinstance(table, dict):
+        return len(table) * TABLE_ENTRY_BYTES
+    return sum(len(values) * values.itemsize for values in table)
+
+
+def path_from_table(table, target):
+    """
+    Returns the list of (movie_id, person_id) pairs from the table's
+    source to the target, or None if the target is not connected.
+    """
+    if not isinstance(table, dict):
+        return graph.table_path(table, target)
+    if target not in table:
+        return None
+    path = []
+    _, movie_id, parent = table[target]
+    while parent is not None:
+        path.append((movie_id, target))
+        target = parent
+        _, movie_id, parent = table[target]
+    path.reverse()
+    return path
+
+
+def cached_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, answered from the
+    source's cached BFS table.
+
+    If no possible path, returns None.
+    """
+    return path_from_table(distance_table(source), target)
+
 
 def person_id_for_name(name):
     """
@@ -181,6 +499,26 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns the list of IMDB ids exactly matching a person's name,
+    without asking the user to resolve ambiguities.
+    """
+    return sorted(names.get(name.lower(), set()))
+
+
+def find_people(query, limit=10):
+    """
+    Returns up to `limit` people whose names match `query` exactly,
+    by prefix, or approximately, as (person_id, name, birth, movie count)
+    tuples, best match first. Never prompts.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names, people)
+    return name_index.search(query, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
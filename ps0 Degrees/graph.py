@@ -0,0 +1,594 @@
+"""
+Compact, integer-indexed graph of people and movies.
+
+People and movies are interned to consecutive integers, and the
+person -> movie and movie -> person adjacency is stored in CSR form
+in flat integer arrays instead of dicts of sets of string IDs.
+
+A graph can be saved as a binary snapshot and memory-mapped back,
+so loading it costs almost nothing compared to parsing the CSVs.
+The snapshot also stores people and movies sorted by ID and people
+sorted by lowercase name, so lookups binary-search the mapped file
+instead of decoding every string into a dict first.
+"""
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+# Snapshot layout: header, then sections of native 32-bit ints and UTF-8 bytes
+SNAPSHOT = "graph.snapshot"
+MAGIC = b"DEGSNAP3"
+HEADER = struct.Struct("=8s8sQQ")
+SECTION = struct.Struct("=QQ")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+ORDERS = ("person_order", "movie_order", "name_order")
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years")
+
+
+class CompactGraph():
+    """
+    Movies of person p are person_movies[person_offsets[p]:person_offsets[p + 1]],
+    and stars of movie m are movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+
+    person_order and movie_order, when given, list the indexes sorted by
+    ID, and name_order lists the person indexes sorted by lowercase name.
+    `orphans` counts the stars rows skipped for naming an unknown person
+    or movie when the graph was built from CSV.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_order=None, movie_order=None, name_order=None, orphans=0):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+        self.orphans = orphans
+
+        # Maps from string IDs back to indexes, built on first use
+        # when there are no sorted orders to search
+        self._person_index = None
+        self._movie_index = None
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds the graph straight from the CSV files, without going
+        through the dict-based representation used by degrees.py.
+        Stars rows naming an unknown person or movie are skipped.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        edge_people = array("i")
+        edge_movies = array("i")
+        orphans = 0
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                p = person_index.get(row["person_id"])
+                m = movie_index.get(row["movie_id"])
+                if p is None or m is None:
+                    orphans += 1
+                    continue
+                edge_people.append(p)
+                edge_movies.append(m)
+
+        graph = cls.from_edges(person_ids, person_names, person_births,
+                               movie_ids, movie_titles, movie_years,
+                               edge_people, edge_movies)
+        graph._person_index = person_index
+        graph._movie_index = movie_index
+        graph.orphans = orphans
+        return graph
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds the graph from the `people` and `movies` dicts
+        filled in by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person_id, person in people.items():
+            p = person_index[person_id]
+            for movie_id in person["movies"]:
+                edge_people.append(p)
+                edge_movies.append(movie_index[movie_id])
+
+        return cls.from_edges(
+            person_ids,
+            [people[person_id]["name"] for person_id in person_ids],
+            [people[person_id]["birth"] for person_id in person_ids],
+            movie_ids,
+            [movies[movie_id]["title"] for movie_id in movie_ids],
+            [movies[movie_id]["year"] for movie_id in movie_ids],
+            edge_people, edge_movies
+        )
+
+    @classmethod
+    def from_edges(cls, person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   edge_people, edge_movies):
+        """
+        Builds both CSR adjacency arrays from parallel arrays of
+        (person index, movie index) edges.
+        """
+        person_offsets, person_movies = csr(len(person_ids), edge_people, edge_movies)
+        movie_offsets, movie_people = csr(len(movie_ids), edge_movies, edge_people)
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_people)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-maps a snapshot written by `save`. The arrays and
+        strings are read straight from the mapped file on access.
+        Raises ValueError, TypeError or struct.error if the file is not
+        a complete snapshot for this machine.
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(data)
+        magic, byteorder, count, orphans = HEADER.unpack_from(view)
+        if magic != MAGIC or byteorder.rstrip(b"\0").decode() != sys.byteorder:
+            raise ValueError(f"{path} is not a snapshot for this machine")
+        if count != len(ARRAYS) + len(ORDERS) + 2 * len(STRINGS):
+            raise ValueError(f"{path} has {count} sections")
+
+        sections = []
+        for i in range(count):
+            start, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+            if start + length > len(view):
+                raise ValueError(f"{path} is truncated")
+            sections.append(view[start:start + length])
+
+        fields = {}
+        for name in ARRAYS + ORDERS:
+            fields[name] = sections.pop(0).cast("i")
+        for name in STRINGS:
+            offsets = sections.pop(0).cast("i")
+            fields[name] = StringTable(offsets, sections.pop(0))
+        return cls(orphans=orphans, **fields)
+
+    def save(self, path):
+        """
+        Writes the graph to `path` as a binary snapshot,
+        sorting it by ID and by name first if not already sorted.
+        """
+        if self.person_order is None:
+            self.person_order = sort_order(self.person_ids)
+            self.movie_order = sort_order(self.movie_ids)
+            self.name_order = sort_order(self.person_names, str.lower)
+        sections = [as_array(getattr(self, name)).tobytes() for name in ARRAYS + ORDERS]
+        for name in STRINGS:
+            table = StringTable.from_strings(getattr(self, name))
+            sections.append(as_array(table.offsets).tobytes())
+            sections.append(bytes(table.data))
+
+        header = HEADER.pack(MAGIC, sys.byteorder.encode(), len(sections), self.orphans)
+        position = HEADER.size + len(sections) * SECTION.size
+        layout = []
+        for section in sections:
+            # Keep every section aligned for the 32-bit casts in `load`
+            position += -position % 8
+            layout.append((position, len(section)))
+            position += len(section)
+
+        with open(path, "wb") as f:
+            f.write(header)
+            for start, length in layout:
+                f.write(SECTION.pack(start, length))
+            for (start, _), section in zip(layout, sections):
+                f.write(b"\0" * (start - f.tell()))
+                f.write(section)
+
+    def person_index(self, person_id):
+        """
+        Returns the integer index for a person's IMDB id, or None.
+        """
+        if self._person_index is None and self.person_order is not None:
+            return find(self.person_order, self.person_ids, person_id)
+        if self._person_index is None:
+            self._person_index = {
+                person_id: i for i, person_id in enumerate(self.person_ids)
+            }
+        return self._person_index.get(person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer index for a movie's IMDB id, or None.
+        """
+        if self._movie_index is None and self.movie_order is not None:
+            return find(self.movie_order, self.movie_ids, movie_id)
+        if self._movie_index is None:
+            self._movie_index = {
+                movie_id: i for i, movie_id in enumerate(self.movie_ids)
+            }
+        return self._movie_index.get(movie_id)
+
+    def people_named(self, name):
+        """
+        Returns the set of person_ids whose lowercase name is `name`,
+        searching name_order, which must be set.
+        """
+        person_ids = set()
+        position = lower_bound(self.name_order, self.person_names, name, str.lower)
+        while position < len(self.name_order):
+            p = self.name_order[position]
+            if self.person_names[p].lower() != name:
+                break
+            person_ids.add(self.person_ids[p])
+            position += 1
+        return person_ids
+
+    def movies_for(self, p):
+        """
+        Returns the movie indexes person `p` starred in.
+        """
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_for(self, m):
+        """
+        Returns the person indexes who starred in movie `m`.
+        """
+        return self.movie_people[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors(self, p):
+        """
+        Yields (movie index, person index) pairs for people
+        who starred with person `p`.
+        """
+        for m in self.movies_for(p):
+            for q in self.stars_for(m):
+                yield m, q
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person, like degrees.neighbors_for_person.
+        """
+        return {
+            (self.movie_ids[m], self.person_ids[q])
+            for m, q in self.neighbors(self.person_index(person_id))
+        }
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        s = self.person_index(source)
+        t = self.person_index(target)
+        if s is None or t is None:
+            return None
+        if s == t:
+            return []
+
+        # Map each reached person to the (movie, person) step that reached them.
+        # A movie only needs expanding once: its first expansion reaches all its stars.
+        parents = {s: None}
+        expanded_movies = set()
+        layer = [s]
+        while layer:
+            next_layer = []
+            for p in layer:
+                for m in self.movies_for(p):
+                    if m in expanded_movies:
+                        continue
+                    expanded_movies.add(m)
+                    for q in self.stars_for(m):
+                        if q in parents:
+                            continue
+                        parents[q] = (m, p)
+                        if q == t:
+                            return self.trace(parents, t)
+                        next_layer.append(q)
+            layer = next_layer
+        return None
+
+    def distance_table(self, source):
+        """
+        Runs a full BFS from person index `source` and returns its table
+        as three arrays indexed by person: the distance from the source,
+        and the movie and person the BFS reached them through, all -1
+        for people not connected to the source.
+        """
+        size = len(self.person_ids)
+        distances = array("i", [-1]) * size
+        via_movies = array("i", [-1]) * size
+        via_people = array("i", [-1]) * size
+        expanded_movies = bytearray(len(self.movie_ids))
+        distances[source] = 0
+        layer = [source]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer = []
+            for p in layer:
+                for m in self.movies_for(p):
+                    if expanded_movies[m]:
+                        continue
+                    expanded_movies[m] = 1
+                    for q in self.stars_for(m):
+                        if distances[q] < 0:
+                            distances[q] = distance
+                            via_movies[q] = m
+                            via_people[q] = p
+                            next_layer.append(q)
+            layer = next_layer
+        return distances, via_movies, via_people
+
+    def table_path(self, table, target):
+        """
+        Returns the list of (movie_id, person_id) pairs from the source
+        of a `distance_table` to the target, or None if not connected.
+        """
+        distances, via_movies, via_people = table
+        t = self.person_index(target)
+        if t is None or distances[t] < 0:
+            return None
+        path = []
+        while distances[t] > 0:
+            path.append((self.movie_ids[via_movies[t]], self.person_ids[t]))
+            t = via_people[t]
+        path.reverse()
+        return path
+
+    def trace(self, parents, p):
+        """
+        Follows `parents` back from person `p` and returns the
+        path to it as a list of (movie_id, person_id) pairs.
+        """
+        path = []
+        while parents[p] is not None:
+            m, parent = parents[p]
+            path.append((self.movie_ids[m], self.person_ids[p]))
+            p = parent
+        path.reverse()
+        return path
+
+
+def csr(size, sources, targets):
+    """
+    Groups parallel edge arrays by source index with a counting sort.
+    Returns (offsets, targets) where the targets of source i are
+    targets[offsets[i]:offsets[i + 1]].
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for i in sources:
+        offsets[i + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    position = array("i", offsets[:-1])
+    grouped = array("i", [0]) * len(targets)
+    for i, target in zip(sources, targets):
+        grouped[position[i]] = target
+        position[i] += 1
+    return offsets, grouped
+
+
+def sort_order(strings, key=None):
+    """
+    Returns the indexes of `strings` as an array, sorted by string,
+    or by `key` applied to each string.
+    """
+    if key is None:
+        return array("i", sorted(range(len(strings)), key=strings.__getitem__))
+    return array("i", sorted(range(len(strings)), key=lambda i: key(strings[i])))
+
+
+def lower_bound(order, strings, value, key=None):
+    """
+    Returns the first position in `order` whose string, with `key`
+    applied if given, is not less than `value`.
+    """
+    low, high = 0, len(order)
+    while low < high:
+        middle = (low + high) // 2
+        string = strings[order[middle]]
+        if key is not None:
+            string = key(string)
+        if string < value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def find(order, strings, value):
+    """
+    Returns the index of the string equal to `value`, searching
+    the indexes in `order` sorted by string, or None if absent.
+    """
+    position = lower_bound(order, strings, value)
+    if position < len(order) and strings[order[position]] == value:
+        return order[position]
+    return None
+
+
+def as_array(values):
+    """
+    Returns `values` as an array of 32-bit ints.
+    """
+    if isinstance(values, array):
+        return values
+    return array("i", values)
+
+
+class StringTable():
+    """
+    Immutable sequence of strings stored as one UTF-8 buffer,
+    where string i is data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings):
+        if isinstance(strings, cls):
+            return strings
+        offsets = array("i", [0])
+        data = bytearray()
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(offsets, data)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def load_graph(directory):
+    """
+    Returns the CompactGraph for a dataset directory, loading it from
+    the snapshot if that is newer than every CSV file and otherwise
+    rebuilding it from the CSVs and rewriting the snapshot.
+    """
+    path = os.path.join(directory, SNAPSHOT)
+    newest = max(
+        os.path.getmtime(os.path.join(directory, name))
+        for name in ("people.csv", "movies.csv", "stars.csv")
+    )
+    if os.path.exists(path) and os.path.getmtime(path) > newest:
+        try:
+            return CompactGraph.load(path)
+        except (ValueError, TypeError, struct.error):
+            pass
+
+    graph = CompactGraph.from_csv(directory)
+    temporary = path + ".tmp"
+    graph.save(temporary)
+    os.replace(temporary, path)
+    return graph
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like degrees.people:
+    maps person_ids to a dictionary of: name, birth, movies.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        p = self.graph.person_index(person_id)
+        if p is None:
+            raise KeyError(person_id)
+        return {
+            "name": self.graph.person_names[p],
+            "birth": self.graph.person_births[p],
+            "movies": {self.graph.movie_ids[m] for m in self.graph.movies_for(p)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like degrees.movies:
+    maps movie_ids to a dictionary of: title, year, stars.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        m = self.graph.movie_index(movie_id)
+        if m is None:
+            raise KeyError(movie_id)
+        return {
+            "title": self.graph.movie_titles[m],
+            "year": self.graph.movie_years[m],
+            "stars": {self.graph.person_ids[p] for p in self.graph.stars_for(m)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like degrees.names:
+    maps lowercase names to a set of person_ids.
+    Single names are looked up in the graph; the underlying dict is only
+    built the first time every name is needed, to iterate or count them.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._names = None
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = {}
+            for person_id, name in zip(self.graph.person_ids, self.graph.person_names):
+                self._names.setdefault(name.lower(), set()).add(person_id)
+        return self._names
+
+    def __getitem__(self, name):
+        if self._names is not None or self.graph.name_order is None:
+            return self.names[name]
+        person_ids = self.graph.people_named(name)
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
@@ -0,0 +1,136 @@
+"""
+Fast, non-interactive lookup of people by name.
+
+Lowercase names are kept in sorted order for prefix search with bisect,
+and every name is also indexed by its character trigrams so that
+misspelled queries still find close matches.
+"""
+from bisect import bisect_left
+from collections import Counter
+
+# How many names to return at most from a prefix or trigram match
+CANDIDATES = 100
+
+# Fraction of the query's trigrams a name must share to be returned
+SHARED_TRIGRAMS = 0.5
+
+# How many posting entries to read at most, rarest trigrams first
+SCANNED_POSTINGS = 1000
+
+
+def trigrams(text):
+    """
+    Returns the set of character trigrams of `text`,
+    padded so that short names still produce some.
+    """
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex():
+    """
+    Index over a `names` map of lowercase names to sets of person_ids,
+    as built by degrees.load_data.
+    """
+
+    def __init__(self, names, people):
+        self.names = names
+        self.people = people
+        self.keys = sorted(names)
+
+        # Maps each trigram to the positions in self.keys of names containing it,
+        # and counts the distinct trigrams of each name
+        self.postings = {}
+        self.sizes = []
+        for position, key in enumerate(self.keys):
+            found = trigrams(key)
+            for trigram in found:
+                self.postings.setdefault(trigram, []).append(position)
+            self.sizes.append(len(found))
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` candidates for `query` as
+        (person_id, name, birth, movie count) tuples, best first:
+        exact matches, then prefix matches, then trigram matches
+        by similarity, each ordered by movie count. Trigram matches are
+        only looked for when no name matches exactly or by prefix.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        ranked = {}
+        for key in self.prefix_matches(query):
+            ranked[key] = (0 if key == query else 1, 0)
+        if not ranked:
+            for key, similarity in self.trigram_matches(query):
+                ranked.setdefault(key, (2, -similarity))
+
+        candidates = []
+        for key, rank in ranked.items():
+            for person_id in self.names.get(key, ()):
+                person = self.people[person_id]
+                count = len(person["movies"])
+                candidates.append((rank, -count, person_id, person["name"], person["birth"]))
+        candidates.sort()
+        return [
+            (person_id, name, birth, -count)
+            for _, count, person_id, name, birth in candidates[:limit]
+        ]
+
+    def prefix_matches(self, query):
+        """
+        Returns names starting with `query`, in sorted order.
+        """
+        matches = []
+        position = bisect_left(self.keys, query)
+        while (position < len(self.keys) and len(matches) < CANDIDATES
+               and self.keys[position].startswith(query)):
+            matches.append(self.keys[position])
+            position += 1
+        return matches
+
+    def trigram_matches(self, query):
+        """
+        Returns (name, similarity) pairs for the names most similar to
+        `query`, scored by Jaccard similarity of trigrams, keeping names
+        that share at least SHARED_TRIGRAMS of the query's trigrams.
+
+        Candidates are gathered from the postings of the query's rarest
+        trigrams, reading at most SCANNED_POSTINGS entries, since a typo
+        only removes the few trigrams around it. The trigrams left unread
+        are then checked directly against each candidate's name.
+        """
+        wanted = trigrams(query)
+        least = max(1, int(SHARED_TRIGRAMS * len(wanted)))
+        ordered = sorted(wanted, key=lambda trigram: len(self.postings.get(trigram, ())))
+
+        shared = Counter()
+        scanned = 0
+        read = 0
+        for trigram in ordered:
+            posting = self.postings.get(trigram, ())
+            if read and scanned + len(posting) > SCANNED_POSTINGS:
+                break
+            shared.update(posting)
+            scanned += len(posting)
+            read += 1
+        unread = ordered[read:]
+
+        # A name sharing `least` trigrams shares this many of those read
+        needed = max(1, least - len(unread))
+        candidates = sorted(
+            (position for position, count in shared.items() if count >= needed),
+            key=lambda position: -shared[position]
+        )[:4 * CANDIDATES]
+
+        matches = []
+        for position in candidates:
+            key = self.keys[position]
+            padded = f"  {key} "
+            count = shared[position] + sum(trigram in padded for trigram in unread)
+            if count >= least:
+                matches.append((key, count / (len(wanted) + self.sizes[position] - count)))
+        matches.sort(key=lambda match: -match[1])
+        return matches[:CANDIDATES]
@@ -0,0 +1,126 @@
+"""
+Regression tests for the degrees-of-separation searches on `small`.
+
+Run with: python -m unittest test_degrees
+"""
+import itertools
+import os
+import unittest
+from collections import deque
+
+import degrees
+from graph import CompactGraph
+
+SMALL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+def reference_distance(source, target):
+    """
+    Plain textbook BFS over the people and movies dicts, goal-testing
+    on removal. Returns the number of degrees, or None if not connected.
+    """
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        if person_id == target:
+            return distances[person_id]
+        for movie_id in degrees.people[person_id]["movies"]:
+            for neighbor in degrees.movies[movie_id]["stars"]:
+                if neighbor not in distances:
+                    distances[neighbor] = distances[person_id] + 1
+                    queue.append(neighbor)
+    return None
+
+
+class SearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        degrees.load_data(SMALL)
+        cls.graph = CompactGraph.from_csv(SMALL)
+        cls.pairs = list(itertools.permutations(sorted(degrees.people), 2))
+        cls.expected = {
+            (source, target): reference_distance(source, target)
+            for source, target in cls.pairs
+        }
+
+    def assertShortest(self, search):
+        """
+        Checks `search` on every ordered pair of people: each path must
+        follow shared movies from source to target and be as short as
+        the reference BFS, and unconnected pairs must give None.
+        """
+        for source, target in self.pairs:
+            with self.subTest(source=source, target=target):
+                path = search(source, target)
+                distance = self.expected[(source, target)]
+                if distance is None:
+                    self.assertIsNone(path)
+                    continue
+                self.assertIsNotNone(path)
+                self.assertEqual(len(path), distance)
+                person_id = source
+                for movie_id, next_person in path:
+                    stars = degrees.movies[movie_id]["stars"]
+                    self.assertIn(person_id, stars)
+                    self.assertIn(next_person, stars)
+                    person_id = next_person
+                self.assertEqual(person_id, target)
+
+    def test_some_pairs_unconnected(self):
+        self.assertIn(None, self.expected.values())
+
+    def test_shortest_path(self):
+        self.assertShortest(degrees.shortest_path)
+
+    def test_bidirectional_path(self):
+        self.assertShortest(degrees.bidirectional_path)
+
+    def test_cached_path(self):
+        degrees.tables.clear()
+        self.assertShortest(degrees.cached_path)
+
+    def test_compact_graph(self):
+        self.assertShortest(self.graph.shortest_path)
+
+    def test_same_person(self):
+        for search in (degrees.shortest_path, degrees.bidirectional_path,
+                       degrees.cached_path, self.graph.shortest_path):
+            self.assertEqual(search("102", "102"), [])
+
+
+class CompactTableTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        degrees.load_data(SMALL)
+        cls.expected = {
+            (source, target): reference_distance(source, target)
+            for source, target in itertools.permutations(sorted(degrees.people), 2)
+        }
+        degrees.load_data(SMALL, compact=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        degrees.load_data(SMALL)
+
+    def test_cached_path(self):
+        for (source, target), distance in self.expected.items():
+            with self.subTest(source=source, target=target):
+                path = degrees.cached_path(source, target)
+                self.assertEqual(None if path is None else len(path), distance)
+
+    def test_cache_limit(self):
+        limit = degrees.TABLE_CACHE_BYTES
+        degrees.TABLE_CACHE_BYTES = 0
+        try:
+            for source in ("102", "129", "158"):
+                degrees.distance_table(source)
+            self.assertEqual(list(degrees.tables), ["158"])
+        finally:
+            degrees.TABLE_CACHE_BYTES = limit
+
+
+if __name__ == "__main__":
+    unittest.main()
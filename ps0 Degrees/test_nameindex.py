@@ -0,0 +1,85 @@
+"""
+Tests for nameindex.NameIndex.
+
+Run with: python -m unittest test_nameindex
+"""
+import random
+import string
+import time
+import unittest
+
+from nameindex import NameIndex
+
+# Number of random names in the large index
+NAMES = 100000
+
+# First names for the random names, so that many share their trigrams
+FIRST_NAMES = (
+    "Kevin", "Karen", "Keith", "Mary", "John", "James", "Robert", "Linda",
+    "Michael", "Sarah", "David", "Laura", "Paul", "Emma", "Mark", "Anna",
+)
+
+# Seconds a lookup may take on average
+LATENCY = 0.001
+
+
+def build_index(extra):
+    """
+    Returns a NameIndex over NAMES random names plus the
+    (person_id, name) pairs in `extra`.
+    """
+    generator = random.Random(0)
+    people = {}
+    names = {}
+    rows = []
+    for n in range(NAMES):
+        surname = "".join(
+            generator.choice(string.ascii_lowercase)
+            for _ in range(generator.randint(3, 9))
+        )
+        rows.append((str(n), f"{generator.choice(FIRST_NAMES)} {surname.capitalize()}"))
+    for person_id, name in rows + extra:
+        people[person_id] = {"name": name, "birth": "", "movies": set()}
+        names.setdefault(name.lower(), set()).add(person_id)
+    return NameIndex(names, people)
+
+
+class NameIndexTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = build_index([
+            ("k1", "Kevin Bacon"),
+            ("k2", "Kevin Bakr"),
+            ("k3", "Kevin Xxacnyigd"),
+            ("k4", "Kevin Baker"),
+        ])
+
+    def test_exact_match_first(self):
+        self.assertEqual(self.index.search("kevin bacon")[0][0], "k1")
+
+    def test_prefix_match(self):
+        self.assertIn("k1", [result[0] for result in self.index.search("kevin bac")])
+
+    def test_misspelled_name_found(self):
+        for query in ("kevin bacn", "kevin bakon", "kevn bacon", "kevin baconn"):
+            with self.subTest(query=query):
+                results = [result[0] for result in self.index.search(query, limit=3)]
+                self.assertIn("k1", results)
+
+    def test_latency(self):
+        queries = ("kevin bacon", "kevin bac", "kevn bacon", "kevin bacn",
+                   "kevin bakon", "marry smith", "k", "zzzzqq")
+        for query in queries:
+            with self.subTest(query=query):
+                start = time.perf_counter()
+                for _ in range(20):
+                    self.index.search(query)
+                self.assertLess((time.perf_counter() - start) / 20, LATENCY)
+
+    def test_blank_query(self):
+        self.assertEqual(self.index.search("   "), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,7 @@
+import time
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -16,13 +20,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier holding each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -31,10 +38,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.forget(node)
             return node
 
+    def forget(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -42,6 +56,43 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.forget(node)
             return node
+
+
+class SearchStats():
+    """
+    Counters filled in by a search when instrumentation is enabled.
+    `on_expand`, if given, is called with every node the search expands.
+    `neighbor_seconds` is the time spent in neighbors_for_person alone,
+    not in checking or queueing the neighbors it returns.
+    """
+
+    def __init__(self, on_expand=None):
+        self.on_expand = on_expand
+        self.nodes_expanded = 0
+        self.frontier_peak = 0
+        self.neighbor_seconds = 0.0
+        self.dedup_hits = 0
+
+    def __repr__(self):
+        return (f"SearchStats(nodes_expanded={self.nodes_expanded}, "
+                f"frontier_peak={self.frontier_peak}, "
+                f"neighbor_seconds={self.neighbor_seconds:.6f}, "
+                f"dedup_hits={self.dedup_hits})")
+
+    def expand(self, node):
+        self.nodes_expanded += 1
+        if self.on_expand is not None:
+            self.on_expand(node)
+
+    def frontier_size(self, size):
+        if size > self.frontier_peak:
+            self.frontier_peak = size
+
+    def start_neighbors(self):
+        return time.perf_counter()
+
+    def stop_neighbors(self, start):
+        self.neighbor_seconds += time.perf_counter() - start